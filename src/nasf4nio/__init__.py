@@ -1,3 +1,6 @@
 from .api import Problem, Solution, Component, LocalMove
 from .tests.base import property_test
-from .utils import *
\ No newline at end of file
+from .utils import *
+from .profiler import Profiler
+from .binary import BinaryProblem, BinarySolution
+from .permutation import PermutationProblem, PermutationSolution
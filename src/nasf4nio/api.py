@@ -3,7 +3,7 @@ from __future__ import annotations
 from abc import ABC
 from dataclasses import dataclass
 
-from typing import Optional, Hashable, Iterable, TypeVar, Any, Generic
+from typing import Optional, Hashable, Iterable, Sequence, TypeVar, Any, Generic
 from typing_extensions import Self
 
 T = TypeVar("T")
@@ -46,9 +46,18 @@ class Solution(ABC, Generic[T, P, C, LM]):
     def add_moves(self: Self) -> Iterable[C]:
         raise NotImplementedError
 
+    def invalidated_add_moves(self: Self) -> Optional[tuple[Iterable[C], Iterable[C]]]:
+        raise NotImplementedError
+
+    def submodular(self: Self) -> bool:
+        raise NotImplementedError
+
     def heuristic_add_moves(self: Self) -> Iterable[C]:
         raise NotImplementedError
 
+    def heuristic_add_move(self: Self) -> Optional[C]:
+        raise NotImplementedError
+
     def remove_moves(self: Self) -> Iterable[C]:
         raise NotImplementedError
 
@@ -58,6 +67,15 @@ class Solution(ABC, Generic[T, P, C, LM]):
     def random_local_moves_wor(self: Self) -> Iterable[LM]:
         raise NotImplementedError
 
+    def dlb_keys(self: Self) -> Iterable[Hashable]:
+        raise NotImplementedError
+
+    def local_moves_at(self: Self, key: Hashable) -> Iterable[LM]:
+        raise NotImplementedError
+
+    def touched(self: Self, move: LM) -> Iterable[Hashable]:
+        raise NotImplementedError
+
     def random_add_move(self: Self) -> Optional[C]:
         raise NotImplementedError
 
@@ -79,20 +97,47 @@ class Solution(ABC, Generic[T, P, C, LM]):
     def perturb(self: Self) -> None:
         raise NotImplementedError
 
+    def checkpoint(self: Self) -> Hashable:
+        raise NotImplementedError
+
+    def rollback(self: Self, mark: Hashable) -> None:
+        raise NotImplementedError
+
     def heuristic_value(self: Self, component: C) -> Optional[T]:
         raise NotImplementedError
+
+    def heuristic_values(self: Self) -> tuple[Sequence[C], Any]:
+        raise NotImplementedError
     
+    def move_attribute(self: Self, move: LM) -> Hashable:
+        raise NotImplementedError
+
+    def fingerprint(self: Self) -> Hashable:
+        raise NotImplementedError
+
+    def fingerprint_local(self: Self, move: LM) -> Hashable:
+        raise NotImplementedError
+
     def objective_increment_local(self: Self, move: LM) -> Optional[T]:
         raise NotImplementedError
 
+    def objective_increments_local(self: Self, moves: Sequence[LM]) -> Any:
+        raise NotImplementedError
+
     def objective_increment_add(self: Self, component: C) -> Optional[T]:
         raise NotImplementedError
 
+    def objective_increments_add(self: Self) -> tuple[Sequence[C], Any]:
+        raise NotImplementedError
+
     def objective_increment_remove(self: Self, component: C) -> Optional[T]:
         raise NotImplementedError
 
     def upper_bound_increment_add(self: Self, component: C) -> Optional[T]:
         raise NotImplementedError
 
+    def upper_bound_increments_add(self: Self) -> tuple[Sequence[C], Any]:
+        raise NotImplementedError
+
     def upper_bound_increment_remove(self: Self, component: C) -> Optional[T]:
         raise NotImplementedError
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import sys
+import json
+import random
+import argparse
+
+from itertools import islice
+from typing import Optional, Callable, Sequence, Any, TextIO
+from typing_extensions import Self
+
+from .utils import Timer
+from .profiler import Profiler
+from .problems import Knapsack, MaxCut, TSP, SetCover
+from . import solvers
+
+PROBLEMS = {
+    "knapsack": Knapsack.generate,
+    "maxcut": MaxCut.generate,
+    "tsp": TSP.generate,
+    "setcover": SetCover.generate,
+}
+
+class BenchmarkTimer(Timer):
+    def __init__(self: Self, budget: Optional[float] = None, target: Optional[Any] = None) -> None:
+        super().__init__(budget)
+        self.target = target
+        self.time_to_target: Optional[float] = None
+        self.incumbent: Optional[Any] = None
+
+    def iterated(self: Self, objective: Optional[Any] = None) -> None:
+        super().iterated(objective)
+        if objective is not None and (self.incumbent is None or objective > self.incumbent):
+            self.incumbent = objective
+        if (self.time_to_target is None and self.target is not None
+                and objective is not None and objective >= self.target):
+            self.time_to_target = self.elapsed()
+
+def temperature(solution: Any, samples: int = 100) -> float:
+    deltas = [abs(solution.objective_increment_local(m))
+              for m in islice(solution.random_local_moves_wor(), samples)]
+    return sum(deltas) / len(deltas) if len(deltas) and sum(deltas) > 0 else 1.0
+
+def construct(solver: Callable[[Any], Any]) -> Callable[[Any, int, Timer], Any]:
+    return lambda problem, seed, timer: solver(problem.empty_solution())
+
+def construct_search(solver: Callable[[], Any]) -> Callable[[Any, int, Timer], Any]:
+    return lambda problem, seed, timer: solver()(problem.empty_solution(), timer)
+
+def local_search(solver: Callable[[Any], Any]) -> Callable[[Any, int, Timer], Any]:
+    def run(problem: Any, seed: int, timer: Timer) -> Any:
+        solution = problem.random_solution(seed)
+        return solver(solution)(solution, timer)
+    return run
+
+def mmas(problem: Any, seed: int, timer: Timer) -> Any:
+    return solvers.MMAS(1.0, seed=seed)([problem.empty_solution() for _ in range(10)], timer)
+
+SOLVERS = {
+    "SimpleConstruction": construct(solvers.SimpleConstruction()),
+    "GreedyConstruction": construct(solvers.GreedyConstruction()),
+    "GreedyObjectiveConstruction": construct(solvers.GreedyObjectiveConstruction()),
+    "GreedyUpperBoundConstruction": construct(solvers.GreedyUpperBoundConstruction()),
+    "HeuristicConstruction": construct(solvers.HeuristicConstruction()),
+    "NarrowGuidedHeuristicConstruction": construct(solvers.NarrowGuidedHeuristicConstruction()),
+    "BeamSearch": construct_search(solvers.BeamSearch),
+    "IteratedGreedy": construct_search(solvers.IteratedGreedy),
+    "GRASP": construct_search(solvers.GRASP),
+    "HGRASP": construct_search(solvers.HGRASP),
+    "MMAS": mmas,
+    "FirstImprovement": local_search(lambda s: solvers.FirstImprovement()),
+    "DeterministicFirstImprovement": local_search(lambda s: solvers.DeterministicFirstImprovement()),
+    "BestImprovement": local_search(lambda s: solvers.BestImprovement()),
+    "RLS": local_search(lambda s: solvers.RLS()),
+    "ILS": local_search(lambda s: solvers.ILS()),
+    "IslandILS": local_search(lambda s: solvers.IslandILS()),
+    "TabuSearch": local_search(lambda s: solvers.TabuSearch()),
+    "VND": local_search(lambda s: solvers.VND()),
+    "VNS": local_search(lambda s: solvers.VNS()),
+    "SimulatedAnnealing": local_search(lambda s: solvers.SimulatedAnnealing(temperature(s))),
+    "ParallelTempering": local_search(lambda s: solvers.ParallelTempering.geometric(temperature(s) / 10,
+                                                                             temperature(s), 8)),
+}
+
+def target(problem: Any) -> Optional[Any]:
+    try:
+        solution = solvers.GreedyUpperBoundConstruction()(problem.empty_solution())
+    except Exception:
+        return None
+    return solution.objective() if solution.feasible() else None
+
+def run(name: str, problem: Any, seed: int, budget: float, goal: Optional[Any],
+        profile: bool = False) -> dict:
+    random.seed(seed)
+    timer = BenchmarkTimer(budget, goal)
+    profiler = Profiler() if profile else None
+    record: dict = {"solver": name, "seed": seed, "budget": budget, "target": goal}
+    try:
+        if profiler is None:
+            solution = SOLVERS[name](problem, seed, timer)
+        else:
+            with profiler:
+                solution = SOLVERS[name](profiler.wrap(problem), seed, timer)
+        error = None
+    except Exception as e:
+        solution, error = None, f"{type(e).__name__}: {e}"
+    elapsed = timer.elapsed()
+    feasible = solution is not None and solution.feasible()
+    # Solvers report their incumbent to the timer, and the solution they
+    # return must be at least as good
+    if feasible and error is None and timer.incumbent is not None and solution.objective() < timer.incumbent:
+        error = f"Returned objective {solution.objective()} is worse than the incumbent {timer.incumbent}"
+    record.update({
+        "objective": solution.objective() if feasible else None,
+        "feasible": feasible,
+        "elapsed": elapsed,
+        "evaluations": timer.evaluations,
+        "evaluations_per_second": timer.evaluations / elapsed if elapsed > 0 else None,
+        "iterations": timer.iterations,
+        "time_to_target": timer.time_to_target,
+        "error": error,
+    })
+    if profiler is not None:
+        record["profile"] = profiler.as_dict()
+    return record
+
+def benchmark(problems: Sequence[str], names: Sequence[str], sizes: Sequence[int],
+              budget: float, seed: int, output: TextIO, profile: bool = False) -> None:
+    for p in problems:
+        for n in sizes:
+            problem = PROBLEMS[p](n, seed=seed)
+            goal = target(problem)
+            for name in names:
+                record = {"problem": p, "size": n, **run(name, problem, seed, budget, goal, profile)}
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the solvers on the reference problems")
+    parser.add_argument("--problems", nargs="+", choices=list(PROBLEMS), default=list(PROBLEMS))
+    parser.add_argument("--solvers", nargs="+", choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout)
+    parser.add_argument("--profile", action="store_true",
+                        help="record the time spent in each solution method")
+    args = parser.parse_args(argv)
+    benchmark(args.problems, args.solvers, args.sizes, args.budget, args.seed, args.output, args.profile)
+
+if __name__ == "__main__":
+    main()
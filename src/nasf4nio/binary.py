@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import random
+
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Iterator, Sequence, List, Any
+from typing_extensions import Self
+
+from . import api
+from .utils import MASK64, component_hash, shuffled, LazySequence
+from .tests import objective_increment_add_test, objective_increments_local_test, batched_add_moves_test, checkpoint_rollback_test, dont_look_bits_test, fingerprint_test
+from .tests.base import property_test
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+@dataclass(frozen=True)
+class Bit(api.Component):
+    i: int
+
+    def id(self: Self) -> int:
+        return self.i
+
+@dataclass(frozen=True)
+class Flip(api.LocalMove):
+    i: int
+
+# Subset selection over n items with the objective
+#
+#   constant + linear @ x + x @ quadratic @ x
+#
+# for the 0/1 membership vector x, where quadratic is a symmetric n x n
+# matrix (or None for a linear objective). Constraints are added by
+# subclassing BinarySolution, overriding addable, addable_mask and feasible,
+# and returning the subclass from empty_solution.
+@property_test(objective_increment_add_test)
+@property_test(objective_increments_local_test)
+@property_test(batched_add_moves_test)
+@property_test(fingerprint_test)
+@property_test(checkpoint_rollback_test)
+@property_test(dont_look_bits_test)
+class BinaryProblem(api.Problem):
+    def __init__(self: Self, n: int, linear: Optional[Any] = None, quadratic: Optional[Any] = None,
+                 constant: Any = 0) -> None:
+        if np is None:
+            raise ImportError("BinaryProblem requires numpy")
+        self.n = n
+        self.linear = np.zeros(n, dtype=int) if linear is None else _numeric(linear)
+        if self.linear.shape != (n,):
+            raise ValueError("The linear term must have n entries")
+        if quadratic is None:
+            self.quadratic = None
+            self.diagonal = np.zeros(n, dtype=self.linear.dtype)
+            self.neighbours: List[List[int]] = [[] for _ in range(n)]
+        else:
+            self.quadratic = _numeric(quadratic)
+            if self.quadratic.shape != (n, n) or not np.array_equal(self.quadratic, self.quadratic.T):
+                raise ValueError("The quadratic term must be a symmetric n x n matrix")
+            self.diagonal = self.quadratic.diagonal().copy()
+            self.rows = [np.flatnonzero(row) for row in self.quadratic]
+            self.rows = [row[row != i] for i, row in enumerate(self.rows)]
+            self.neighbours = [row.tolist() for row in self.rows]
+            self.pairs = [list(zip(row.tolist(), (2 * self.quadratic[i, row]).tolist()))
+                          for i, row in enumerate(self.rows)]
+        self.constant = constant
+        # The gains are kept as 64-bit integers unless they are floating point,
+        # and gains() views them with the matching dtype
+        gains = self.linear + self.diagonal
+        self.dtype = np.dtype(np.float64 if np.issubdtype(gains.dtype, np.floating) else np.int64)
+        self.gains = array("d" if self.dtype == np.float64 else "q", gains.astype(self.dtype).tolist())
+        self.hashes = [component_hash(i) for i in range(n)]
+
+    def empty_solution(self: Self) -> BinarySolution:
+        return BinarySolution(self)
+
+    def random_solution(self: Self, seed: Optional[int] = None) -> BinarySolution:
+        rng = random.Random(seed)
+        s = self.empty_solution()
+        for i in rng.sample(range(self.n), self.n):
+            if rng.random() < 0.5 and s.addable(i):
+                s.add(Bit(i))
+        return s
+
+# gain[i] is the change in the objective when item i is flipped. Flipping i
+# changes the gains of its neighbours (the other non-zeros of quadratic[i]) by
+# 2 quadratic[i] with the signs of both flips, which is a single vector
+# update. Membership is kept in a
+# bytearray and the gains in an array, which are cheap to index and to copy,
+# and the batched methods see both through zero-copy numpy views.
+#
+# The add moves are the free items that are addable and improve the
+# objective. upper_bound adds the positive gains of the free addable items to
+# the objective, which is only a bound when quadratic has no positive entry
+# off the diagonal and otherwise an estimate; subclasses that know better
+# override it along with upper_bound_increment_add.
+class BinarySolution(api.Solution[Any, BinaryProblem, Bit, Flip]):
+    def __init__(self: Self, problem: BinaryProblem) -> None:
+        self.problem = problem
+        self.selected = bytearray(problem.n)
+        self.gain = problem.gains[:]
+        self.value = problem.constant
+        self.key = 0
+        self.undo: Optional[dict[int, int]] = None
+
+    # Subclasses holding mutable state other than numbers override copy and
+    # copy it on the result of super().copy().
+    def copy(self: Self) -> Self:
+        s = self.__class__.__new__(self.__class__)
+        s.__dict__.update(self.__dict__)
+        s.selected = self.selected[:]
+        s.gain = self.gain[:]
+        s.undo = None
+        return s
+
+    def mask(self: Self) -> np.ndarray:
+        return np.frombuffer(self.selected, dtype=np.bool_)
+
+    def gains(self: Self) -> np.ndarray:
+        return np.frombuffer(self.gain, dtype=self.problem.dtype)
+
+    def addable(self: Self, i: int) -> bool:
+        return True
+
+    def addable_mask(self: Self) -> Optional[np.ndarray]:
+        return None
+
+    def available(self: Self) -> np.ndarray:
+        free = ~self.mask()
+        if (addable := self.addable_mask()) is not None:
+            free &= addable
+        return free.nonzero()[0]
+
+    def feasible(self: Self) -> bool:
+        return True
+
+    def objective(self: Self) -> Any:
+        return self.value
+
+    def fingerprint(self: Self) -> int:
+        return self.key
+
+    def upper_bound(self: Self) -> Any:
+        gain = self.gains()[self.available()]
+        return self.value + gain[gain > 0].sum().item()
+
+    def components(self: Self) -> Iterator[Bit]:
+        return (Bit(i) for i in np.flatnonzero(self.mask()).tolist())
+
+    def add_moves(self: Self) -> Iterator[Bit]:
+        return (Bit(i) for i in self.__moves().tolist())
+
+    def heuristic_add_moves(self: Self) -> Iterator[Bit]:
+        moves = self.__moves()
+        return (Bit(i) for i in moves[np.argsort(-self.gains()[moves], kind="stable")].tolist())
+
+    def remove_moves(self: Self) -> Iterator[Bit]:
+        return self.components()
+
+    def local_moves(self: Self) -> Iterator[Flip]:
+        return (Flip(i) for i in range(self.problem.n) if self.selected[i] or self.addable(i))
+
+    def random_local_moves_wor(self: Self) -> Iterator[Flip]:
+        return (Flip(i) for i in shuffled(self.problem.n) if self.selected[i] or self.addable(i))
+
+    def dlb_keys(self: Self) -> Iterator[int]:
+        return iter(range(self.problem.n))
+
+    def local_moves_at(self: Self, key: int) -> List[Flip]:
+        return [Flip(key)] if self.selected[key] or self.addable(key) else []
+
+    def touched(self: Self, move: Flip) -> Iterator[int]:
+        yield move.i
+        yield from self.problem.neighbours[move.i]
+
+    def random_add_move(self: Self) -> Optional[Bit]:
+        moves = self.__moves()
+        return Bit(int(moves[random.randrange(len(moves))])) if len(moves) else None
+
+    def random_remove_move(self: Self) -> Optional[Bit]:
+        moves = np.flatnonzero(self.mask())
+        return Bit(int(moves[random.randrange(len(moves))])) if len(moves) else None
+
+    def random_local_move(self: Self) -> Optional[Flip]:
+        return next(self.random_local_moves_wor(), None)
+
+    def add(self: Self, component: Bit) -> None:
+        self.__flip(component.i)
+
+    def remove(self: Self, component: Bit) -> None:
+        self.__flip(component.i)
+
+    def step(self: Self, move: Flip) -> None:
+        if self.selected[move.i]:
+            self.remove(Bit(move.i))
+        else:
+            self.add(Bit(move.i))
+
+    def perturb(self: Self, ks: int = 1) -> None:
+        for _ in range(ks):
+            if (move := self.random_local_move()) is not None:
+                self.step(move)
+
+    # The undo log maps every item flipped since the checkpoint to its state
+    # at the checkpoint, so it never holds more than n entries. The objective
+    # is saved too, since floating point gains do not add back exactly.
+    def checkpoint(self: Self) -> dict[int, int]:
+        self.undo = {}
+        self.saved = self.value
+        return self.undo
+
+    def rollback(self: Self, mark: dict[int, int]) -> None:
+        if mark is not self.undo:
+            raise ValueError("Rollback to a stale checkpoint")
+        for i, selected in mark.items():
+            if self.selected[i] != selected:
+                self.step(Flip(i))
+        self.value = self.saved
+        mark.clear()
+
+    def submodular(self: Self) -> bool:
+        return self.problem.quadratic is None
+
+    def heuristic_value(self: Self, component: Bit) -> Any:
+        return self.gain[component.i]
+
+    def heuristic_values(self: Self) -> tuple[Sequence[Bit], np.ndarray]:
+        return self.objective_increments_add()
+
+    def objective_increment_local(self: Self, move: Flip) -> Any:
+        return self.gain[move.i]
+
+    def objective_increments_local(self: Self, moves: Sequence[Flip]) -> np.ndarray:
+        return self.gains()[np.fromiter((m.i for m in moves), dtype=np.intp, count=len(moves))]
+
+    def objective_increment_add(self: Self, component: Bit) -> Any:
+        return self.gain[component.i]
+
+    def objective_increments_add(self: Self) -> tuple[Sequence[Bit], np.ndarray]:
+        moves = self.__moves()
+        return LazySequence(Bit, moves.tolist()), self.gains()[moves]
+
+    def objective_increment_remove(self: Self, component: Bit) -> Any:
+        return self.gain[component.i]
+
+    # Adding i turns its own positive gain into objective and moves the gains
+    # of the other free items by 2 quadratic[i].
+    def upper_bound_increment_add(self: Self, component: Bit) -> Any:
+        i = component.i
+        g = self.gain[i]
+        incr = g - max(0, g)
+        if self.problem.quadratic is not None:
+            gain, selected = self.gain, self.selected
+            for j, w in self.problem.pairs[i]:
+                if not selected[j] and self.addable(j):
+                    g = gain[j]
+                    incr += max(0, g + w) - max(0, g)
+        return incr
+
+    def upper_bound_increments_add(self: Self) -> tuple[Sequence[Bit], np.ndarray]:
+        moves, q = self.__moves(), self.problem.quadratic
+        gains = self.gains()
+        gain = gains[moves]
+        incrs = gain - np.maximum(gain, 0)
+        if q is not None and len(moves):
+            free = self.available()
+            before = np.maximum(gains[free], 0)
+            after = np.maximum(gains[free] + 2 * q[np.ix_(moves, free)], 0) - before
+            after[moves[:, None] == free] = 0
+            incrs = incrs + after.sum(axis=1)
+        return LazySequence(Bit, moves.tolist()), incrs
+
+    def __moves(self: Self) -> np.ndarray:
+        free = self.available()
+        return free[self.gains()[free] > 0]
+
+    def __flip(self: Self, i: int) -> None:
+        if self.undo is not None:
+            self.undo.setdefault(i, self.selected[i])
+        g = self.gain[i]
+        self.value += g
+        self.selected[i] ^= 1
+        h = self.problem.hashes[i]
+        if self.selected[i]:
+            self.key = (self.key + h) & MASK64
+        else:
+            self.key = (self.key - h) & MASK64
+        if (q := self.problem.quadratic) is not None:
+            rows = self.problem.rows[i]
+            s = 2 if self.selected[i] else -2
+            self.gains()[rows] += np.where(self.mask()[rows], -s, s) * q[i, rows]
+        self.gain[i] = -g
+
+    def __eq__(self: Self, other: object) -> bool:
+        return isinstance(other, BinarySolution) and self.selected == other.selected
+
+# Boolean terms would add up with logical or, so they are read as integers
+def _numeric(a: Any) -> np.ndarray:
+    a = np.asarray(a)
+    return a.astype(np.int64) if a.dtype == np.bool_ else a
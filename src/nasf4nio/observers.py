@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import csv
+import json
+import time
+
+from typing import Protocol, Optional, Iterable, Sequence, Any, TextIO, List, Tuple
+from typing_extensions import Self
+
+# Solvers call observer(event, **data) with one of the events below. The
+# check is a single attribute test when no observer is attached.
+INCUMBENT = "incumbent"
+ITERATION = "iteration"
+RESTART = "restart"
+PHEROMONE_RESET = "pheromone_reset"
+
+class Observer(Protocol):
+    def __call__(self: Self, event: str, **data: Any) -> None: ...
+
+Record = Tuple[float, str, dict]
+
+class Trajectory:
+    def __init__(self: Self, events: Optional[Iterable[str]] = None) -> None:
+        self.events = None if events is None else frozenset(events)
+        self.start = time.perf_counter()
+        self.records: List[Record] = []
+
+    def __call__(self: Self, event: str, **data: Any) -> None:
+        if self.events is None or event in self.events:
+            self.records.append((time.perf_counter() - self.start, event, data))
+
+    def __len__(self: Self) -> int:
+        return len(self.records)
+
+    def __iter__(self: Self):
+        return iter(self.records)
+
+    def incumbents(self: Self) -> List[Tuple[float, Any]]:
+        return [(t, data.get("objective")) for t, event, data in self.records if event == INCUMBENT]
+
+class Observers:
+    def __init__(self: Self, *observers: Observer) -> None:
+        self.observers = observers
+
+    def __call__(self: Self, event: str, **data: Any) -> None:
+        for observer in self.observers:
+            observer(event, **data)
+
+class BufferedWriter:
+    def __init__(self: Self, file: TextIO, buffer: int = 1024,
+                 events: Optional[Iterable[str]] = None) -> None:
+        self.file = file
+        self.buffer = buffer
+        self.events = None if events is None else frozenset(events)
+        self.start = time.perf_counter()
+        self.pending: List[dict] = []
+
+    def __call__(self: Self, event: str, **data: Any) -> None:
+        if self.events is None or event in self.events:
+            self.pending.append({"time": time.perf_counter() - self.start, "event": event, **data})
+            if len(self.pending) >= self.buffer:
+                self.flush()
+
+    def flush(self: Self) -> None:
+        if len(self.pending):
+            self.write(self.pending)
+            self.pending = []
+        self.file.flush()
+
+    def write(self: Self, records: List[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self: Self) -> None:
+        self.flush()
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: Any) -> None:
+        self.close()
+
+class JSONLWriter(BufferedWriter):
+    def write(self: Self, records: List[dict]) -> None:
+        self.file.writelines(json.dumps(r, default=str) + "\n" for r in records)
+
+class CSVWriter(BufferedWriter):
+    def __init__(self: Self, file: TextIO, buffer: int = 1024,
+                 events: Optional[Iterable[str]] = None,
+                 fields: Sequence[str] = ("objective",)) -> None:
+        super().__init__(file, buffer, events)
+        self.writer = csv.DictWriter(file, ["time", "event", *fields], extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self: Self, records: List[dict]) -> None:
+        self.writer.writerows(records)
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import math
+import random
+
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Iterator, Sequence, Tuple, FrozenSet, Union, Callable, Any
+from typing_extensions import Self
+
+from . import api
+from .utils import MASK64, component_hash, shuffled
+from .tests import objective_increment_local_test, fingerprint_test
+from .tests.base import property_test
+
+@dataclass(frozen=True)
+class Edge(api.Component):
+    u: int
+    v: int
+
+    def id(self: Self) -> Tuple[int, int]:
+        return (self.u, self.v) if self.u < self.v else (self.v, self.u)
+
+@dataclass(frozen=True)
+class Arc(api.Component):
+    u: int
+    v: int
+
+    def id(self: Self) -> Tuple[int, int]:
+        return (self.u, self.v)
+
+# Exchanges the items at positions i < j
+@dataclass(frozen=True)
+class Swap(api.LocalMove):
+    i: int
+    j: int
+
+# Reverses the items at positions i < j and everything in between
+@dataclass(frozen=True)
+class TwoOpt(api.LocalMove):
+    i: int
+    j: int
+
+# Moves the item at position i to position j, shifting the ones in between
+@dataclass(frozen=True)
+class Insert(api.LocalMove):
+    i: int
+    j: int
+
+PermutationMove = Union[Swap, TwoOpt, Insert]
+
+NEIGHBOURHOODS = {"swap": Swap, "two_opt": TwoOpt, "insert": Insert}
+
+# Orderings of n items that cost the sum of distances[u][v] over consecutive
+# items u, v (plus the closing pair when cyclic). The objective is the
+# negated cost. 2-opt reverses a segment, so it needs a symmetric matrix.
+@property_test(objective_increment_local_test)
+@property_test(fingerprint_test)
+class PermutationProblem(api.Problem):
+    def __init__(self: Self, distances: Sequence[Sequence[float]], cyclic: bool = True,
+                 neighbourhoods: Optional[Sequence[str]] = None) -> None:
+        self.n = len(distances)
+        self.distances = [list(row) for row in distances]
+        if any(len(row) != self.n for row in self.distances):
+            raise ValueError("The distance matrix must be square")
+        self.cyclic = cyclic
+        self.symmetric = all(self.distances[u][v] == self.distances[v][u]
+                             for u in range(self.n) for v in range(u))
+        if neighbourhoods is None:
+            neighbourhoods = tuple(NEIGHBOURHOODS) if self.symmetric else ("swap", "insert")
+        if any(k not in NEIGHBOURHOODS for k in neighbourhoods):
+            raise ValueError(f"Neighbourhoods must be among {', '.join(NEIGHBOURHOODS)}")
+        if "two_opt" in neighbourhoods and not self.symmetric:
+            raise ValueError("2-opt needs a symmetric distance matrix")
+        self.neighbourhoods = tuple(neighbourhoods)
+        self.edge = Edge if self.symmetric else Arc
+
+    @classmethod
+    def euclidean(cls: type[Self], points: Sequence[Tuple[float, float]], **kwargs: Any) -> Self:
+        return cls([[math.dist(p, q) for q in points] for p in points], **kwargs)
+
+    @classmethod
+    def generate(cls: type[Self], n: int, seed: Optional[int] = None, **kwargs: Any) -> Self:
+        rng = random.Random(seed)
+        return cls.euclidean([(rng.random(), rng.random()) for _ in range(n)], **kwargs)
+
+    def solution(self: Self, order: Sequence[int]) -> PermutationSolution:
+        return PermutationSolution(self, order)
+
+    def random_solution(self: Self, seed: Optional[int] = None) -> PermutationSolution:
+        rng = random.Random(seed)
+        return PermutationSolution(self, rng.sample(range(self.n), self.n))
+
+# order[p] is the item at position p. Every move changes at most four
+# consecutive pairs (up to the reversal of a 2-opt segment, which a symmetric
+# matrix does not see), so increments look at those only. Moves are numbered per neighbourhood, pairs i < j for swap and
+# 2-opt and pairs i != j for insertion, which lets random_local_moves_wor
+# draw them without replacement through shuffled.
+class PermutationSolution(api.Solution[float, PermutationProblem, Edge, PermutationMove]):
+    def __init__(self: Self, problem: PermutationProblem, order: Sequence[int]) -> None:
+        self.problem = problem
+        self.order = array("l", order)
+        self.cost = 0
+        self.key = 0
+        for c in self.components():
+            self.cost += problem.distances[c.u][c.v]
+            self.key = (self.key + component_hash(c.id())) & MASK64
+
+    def copy(self: Self) -> Self:
+        s = self.__class__.__new__(self.__class__)
+        s.problem = self.problem
+        s.order = self.order[:]
+        s.cost = self.cost
+        s.key = self.key
+        return s
+
+    def feasible(self: Self) -> bool:
+        return True
+
+    def objective(self: Self) -> float:
+        return -self.cost
+
+    def fingerprint(self: Self) -> int:
+        return self.key
+
+    def components(self: Self) -> Iterator[Edge]:
+        order, edge = self.order, self.problem.edge
+        yield from (edge(order[k], order[k + 1]) for k in range(self.problem.n - 1))
+        if self.problem.cyclic and self.problem.n > 1:
+            yield edge(order[-1], order[0])
+
+    def swap_moves(self: Self) -> Iterator[Swap]:
+        n = self.problem.n
+        return (Swap(i, j) for i in range(n) for j in range(i + 1, n))
+
+    def two_opt_moves(self: Self) -> Iterator[TwoOpt]:
+        n = self.problem.n
+        return (TwoOpt(i, j) for i in range(n) for j in range(i + 1, n))
+
+    def insert_moves(self: Self) -> Iterator[Insert]:
+        n = self.problem.n
+        return (Insert(i, j) for i in range(n) for j in range(n) if i != j)
+
+    def local_moves(self: Self) -> Iterator[PermutationMove]:
+        for k in self.problem.neighbourhoods:
+            yield from getattr(self, f"{k}_moves")()
+
+    def random_local_moves_wor(self: Self) -> Iterator[PermutationMove]:
+        return map(self.__move, shuffled(self.__moves()))
+
+    def random_local_move(self: Self) -> Optional[PermutationMove]:
+        return self.__move(random.randrange(m)) if (m := self.__moves()) else None
+
+    def step(self: Self, move: PermutationMove) -> None:
+        order, d = self.order, self.problem.distances
+        before, after = self.__pairs(move)
+        removed = [(order[k], order[self.__next(k)]) for k in before]
+        i, j = move.i, move.j
+        if isinstance(move, Swap):
+            order[i], order[j] = order[j], order[i]
+        elif isinstance(move, TwoOpt):
+            order[i:j + 1] = order[i:j + 1][::-1]
+        elif i < j:
+            order[i:j + 1] = order[i + 1:j + 1] + order[i:i + 1]
+        else:
+            order[j:i + 1] = order[i:i + 1] + order[j:i]
+        added = [(order[k], order[self.__next(k)]) for k in after]
+        edge, key = self.problem.edge, self.key
+        for u, v in removed:
+            self.cost -= d[u][v]
+            key -= component_hash(edge(u, v).id())
+        for u, v in added:
+            self.cost += d[u][v]
+            key += component_hash(edge(u, v).id())
+        self.key = key & MASK64
+
+    def perturb(self: Self, ks: int = 1) -> None:
+        for _ in range(ks):
+            if (move := self.random_local_move()) is not None:
+                self.step(move)
+
+    # The same for a move and the one that undoes it: the items a swap
+    # exchanges, the ends of the pairs a 2-opt move breaks and the item an
+    # insertion moves.
+    def move_attribute(self: Self, move: PermutationMove) -> Union[int, FrozenSet[int]]:
+        order = self.order
+        if isinstance(move, Insert):
+            return order[move.i]
+        if isinstance(move, Swap):
+            return frozenset((order[move.i], order[move.j]))
+        return frozenset(order[k % self.problem.n] for k in (move.i - 1, move.i, move.j, move.j + 1)
+                         if self.problem.cyclic or 0 <= k < self.problem.n)
+
+    def fingerprint_local(self: Self, move: PermutationMove) -> int:
+        order, edge, at = self.order, self.problem.edge, self.__after(move)
+        before, after = self.__pairs(move)
+        key = self.key
+        for k in before:
+            key -= component_hash(edge(order[k], order[self.__next(k)]).id())
+        for k in after:
+            key += component_hash(edge(at(k), at(self.__next(k))).id())
+        return key & MASK64
+
+    # Common cases are written out; moves near the ends of the order, or that
+    # break fewer distinct pairs, go through the general count.
+    def objective_increment_local(self: Self, move: PermutationMove) -> float:
+        o, d, n, cyclic = self.order, self.problem.distances, self.problem.n, self.problem.cyclic
+        i, j = move.i, move.j
+        if isinstance(move, TwoOpt):
+            if (0 < i and j < n - 1) or (cyclic and j - i < n - 1):
+                a, b, c, e = o[i - 1], o[i], o[j], o[(j + 1) % n]
+                return d[a][b] + d[c][e] - d[a][c] - d[b][e]
+        elif isinstance(move, Swap):
+            if 1 < j - i and ((0 < i and j < n - 1) or (cyclic and j - i <= n - 2)):
+                p, x, s = o[i - 1], o[i], o[i + 1]
+                q, y, t = o[j - 1], o[j], o[(j + 1) % n]
+                return (d[p][x] + d[x][s] + d[q][y] + d[y][t]
+                        - d[p][y] - d[y][s] - d[q][x] - d[x][t])
+        elif i < j:
+            if (0 < i and j < n - 1) or (cyclic and j - i < n - 1):
+                a, x, b, c, e = o[i - 1], o[i], o[i + 1], o[j], o[(j + 1) % n]
+                return d[a][x] + d[x][b] + d[c][e] - d[a][b] - d[c][x] - d[x][e]
+        elif (0 < j and i < n - 1) or (cyclic and i - j < n - 1):
+            a, x, b, c, e = o[i - 1], o[i], o[(i + 1) % n], o[j - 1], o[j]
+            return d[a][x] + d[x][b] + d[c][e] - d[a][b] - d[c][x] - d[x][e]
+        at = self.__after(move)
+        before, after = self.__pairs(move)
+        return (sum(d[o[k]][o[self.__next(k)]] for k in before)
+                - sum(d[at(k)][at(self.__next(k))] for k in after))
+
+    def __moves(self: Self) -> int:
+        n = self.problem.n
+        return sum(n * (n - 1) if k == "insert" else n * (n - 1) // 2 for k in self.problem.neighbourhoods)
+
+    def __move(self: Self, k: int) -> PermutationMove:
+        n = self.problem.n
+        for kind in self.problem.neighbourhoods:
+            if kind == "insert":
+                if k < n * (n - 1):
+                    i, j = divmod(k, n - 1)
+                    return Insert(i, j if j < i else j + 1)
+                k -= n * (n - 1)
+            elif k < n * (n - 1) // 2:
+                j = (1 + math.isqrt(1 + 8 * k)) // 2
+                return NEIGHBOURHOODS[kind](k - j * (j - 1) // 2, j)
+            else:
+                k -= n * (n - 1) // 2
+        raise IndexError(k)
+
+    # Positions of the pairs (by their first item) that a move breaks and
+    # creates
+    def __pairs(self: Self, move: PermutationMove) -> Tuple[set[int], set[int]]:
+        i, j = move.i, move.j
+        if isinstance(move, Swap):
+            before = after = (i - 1, i, j - 1, j)
+        elif isinstance(move, TwoOpt):
+            before = after = (i - 1, j)
+        elif i < j:
+            before, after = (i - 1, i, j), (i - 1, j - 1, j)
+        else:
+            before, after = (j - 1, i - 1, i), (j - 1, j, i)
+        n = self.problem.n
+        if self.problem.cyclic:
+            return {k % n for k in before}, {k % n for k in after}
+        return {k for k in before if 0 <= k < n - 1}, {k for k in after if 0 <= k < n - 1}
+
+    def __next(self: Self, k: int) -> int:
+        return k + 1 if k + 1 < self.problem.n else 0
+
+    # The item at each position once the move is made
+    def __after(self: Self, move: PermutationMove) -> Callable[[int], int]:
+        o, i, j = self.order, move.i, move.j
+        if isinstance(move, Swap):
+            return lambda p: o[j] if p == i else o[i] if p == j else o[p]
+        if isinstance(move, TwoOpt):
+            return lambda p: o[i + j - p] if i <= p <= j else o[p]
+        if i < j:
+            return lambda p: o[p + 1] if i <= p < j else o[i] if p == j else o[p]
+        return lambda p: o[i] if p == j else o[p - 1] if j < p <= i else o[p]
+
+    def __eq__(self: Self, other: object) -> bool:
+        return isinstance(other, PermutationSolution) and self.order == other.order
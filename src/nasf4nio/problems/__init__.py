@@ -0,0 +1,4 @@
+from .knapsack import Knapsack, KnapsackSolution
+from .maxcut import MaxCut, MaxCutSolution
+from .tsp import TSP, TSPSolution
+from .setcover import SetCover, SetCoverSolution
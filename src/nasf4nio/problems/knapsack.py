@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import random
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional, Iterator, Sequence, Union
+from typing_extensions import Self
+
+from .. import api
+from ..utils import MASK64, component_hash, shuffled, LazySequence
+from ..tests import objective_increment_local_test, objective_increment_add_test, invalidated_add_moves_test, batched_add_moves_test, checkpoint_rollback_test, fingerprint_test
+from ..tests.base import property_test
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+@dataclass(frozen=True)
+class Item(api.Component):
+    i: int
+
+    def id(self: Self) -> int:
+        return self.i
+
+@dataclass(frozen=True)
+class Flip(api.LocalMove):
+    i: int
+
+@dataclass(frozen=True)
+class Swap(api.LocalMove):
+    out: int
+    into: int
+
+KnapsackMove = Union[Flip, Swap]
+
+@property_test(objective_increment_local_test)
+@property_test(objective_increment_add_test)
+@property_test(invalidated_add_moves_test)
+@property_test(batched_add_moves_test)
+@property_test(fingerprint_test)
+@property_test(checkpoint_rollback_test)
+class Knapsack(api.Problem):
+    def __init__(self: Self, values: Sequence[int], weights: Sequence[int], capacity: int) -> None:
+        self.n = len(values)
+        self.values = list(values)
+        self.weights = list(weights)
+        self.capacity = capacity
+        self.ratio = max((v / w for v, w in zip(values, weights) if w > 0), default=0.0)
+        self.by_weight = sorted(range(self.n), key=lambda i: self.weights[i])
+        self.sorted_weights = [self.weights[i] for i in self.by_weight]
+        self.by_ratio = sorted(range(self.n), key=lambda i: -self.values[i] / max(self.weights[i], 1))
+        self.hashes = [component_hash(i) for i in range(self.n)]
+        if np is not None:
+            self.value_array = np.array(self.values, dtype=float)
+            self.weight_array = np.array(self.weights, dtype=float)
+
+    @classmethod
+    def generate(cls: type[Self], n: int, seed: Optional[int] = None) -> Self:
+        rng = random.Random(seed)
+        weights = [rng.randint(1, 1000) for _ in range(n)]
+        values = [w + rng.randint(-100, 100) if w > 100 else rng.randint(1, 200) for w in weights]
+        return cls(values, weights, sum(weights) // 4)
+
+    def empty_solution(self: Self) -> KnapsackSolution:
+        return KnapsackSolution(self)
+
+    def random_solution(self: Self, seed: Optional[int] = None) -> KnapsackSolution:
+        rng = random.Random(seed)
+        s = KnapsackSolution(self)
+        for i in rng.sample(range(self.n), self.n):
+            if s.weight + self.weights[i] <= self.capacity:
+                s.add(Item(i))
+        return s
+
+class KnapsackSolution(api.Solution[int, Knapsack, Item, KnapsackMove]):
+    def __init__(self: Self, problem: Knapsack) -> None:
+        self.problem = problem
+        self.selected = bytearray(problem.n)
+        self.weight = 0
+        self.value = 0
+        self.key = 0
+        self.log: Optional[tuple[str, Item, int, int]] = None
+        self.undo: Optional[dict[int, int]] = None
+
+    def copy(self: Self) -> Self:
+        s = self.__class__.__new__(self.__class__)
+        s.problem = self.problem
+        s.selected = self.selected[:]
+        s.weight = self.weight
+        s.value = self.value
+        s.key = self.key
+        s.log = self.log
+        s.undo = None
+        return s
+
+    def feasible(self: Self) -> bool:
+        return self.weight <= self.problem.capacity
+
+    def objective(self: Self) -> int:
+        return self.value
+
+    def fingerprint(self: Self) -> int:
+        return self.key
+
+    def upper_bound(self: Self) -> float:
+        return self.value + (self.problem.capacity - self.weight) * self.problem.ratio
+
+    def components(self: Self) -> Iterator[Item]:
+        return (Item(i) for i in range(self.problem.n) if self.selected[i])
+
+    def add_moves(self: Self) -> Iterator[Item]:
+        p, residual = self.problem, self.problem.capacity - self.weight
+        for k in range(bisect_right(p.sorted_weights, residual)):
+            if not self.selected[i := p.by_weight[k]]:
+                yield Item(i)
+
+    def invalidated_add_moves(self: Self) -> Optional[tuple[list[Item], list[Item]]]:
+        if self.log is None:
+            return None
+        p = self.problem
+        kind, c, before, after = self.log
+        lo, hi = (after, before) if kind == "add" else (before, after)
+        moves = [Item(i) for k in range(bisect_right(p.sorted_weights, lo), bisect_right(p.sorted_weights, hi))
+                 if not self.selected[i := p.by_weight[k]]]
+        if kind == "add":
+            return [c] + moves, []
+        if p.weights[c.i] <= lo:
+            moves.append(c)
+        return [], moves
+
+    # Add increments do not depend on the solution at all.
+    def submodular(self: Self) -> bool:
+        return True
+
+    def heuristic_add_moves(self: Self) -> Iterator[Item]:
+        p, residual = self.problem, self.problem.capacity - self.weight
+        return (Item(i) for i in p.by_ratio if not self.selected[i] and p.weights[i] <= residual)
+
+    def heuristic_add_move(self: Self) -> Optional[Item]:
+        return next(self.heuristic_add_moves(), None)
+
+    def remove_moves(self: Self) -> Iterator[Item]:
+        return self.components()
+
+    def local_moves(self: Self) -> Iterator[KnapsackMove]:
+        n = self.problem.n
+        for k in range(n * (n + 1)):
+            if (move := self.__move(k)) is not None:
+                yield move
+
+    def flip_moves(self: Self) -> Iterator[Flip]:
+        n = self.problem.n
+        return (move for i in range(n) if (move := self.__move(i * (n + 1) + n)) is not None)
+
+    def swap_moves(self: Self) -> Iterator[Swap]:
+        n = self.problem.n
+        return (move for i in range(n) if self.selected[i]
+                for j in range(n) if (move := self.__move(i * (n + 1) + j)) is not None)
+
+    def random_local_moves_wor(self: Self) -> Iterator[KnapsackMove]:
+        n = self.problem.n
+        for k in shuffled(n * (n + 1)):
+            if (move := self.__move(k)) is not None:
+                yield move
+
+    def random_add_move(self: Self) -> Optional[Item]:
+        moves = list(self.add_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_remove_move(self: Self) -> Optional[Item]:
+        moves = list(self.remove_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_local_move(self: Self) -> Optional[KnapsackMove]:
+        return next(self.random_local_moves_wor(), None)
+
+    def add(self: Self, component: Item) -> None:
+        residual = self.problem.capacity - self.weight
+        if self.undo is not None:
+            self.undo.setdefault(component.i, 0)
+        self.selected[component.i] = 1
+        self.weight += self.problem.weights[component.i]
+        self.value += self.problem.values[component.i]
+        self.key = (self.key + self.problem.hashes[component.i]) & MASK64
+        self.log = ("add", component, residual, self.problem.capacity - self.weight)
+
+    def remove(self: Self, component: Item) -> None:
+        residual = self.problem.capacity - self.weight
+        if self.undo is not None:
+            self.undo.setdefault(component.i, 1)
+        self.selected[component.i] = 0
+        self.weight -= self.problem.weights[component.i]
+        self.value -= self.problem.values[component.i]
+        self.key = (self.key - self.problem.hashes[component.i]) & MASK64
+        self.log = ("remove", component, residual, self.problem.capacity - self.weight)
+
+    def step(self: Self, move: KnapsackMove) -> None:
+        if isinstance(move, Flip):
+            if self.selected[move.i]:
+                self.remove(Item(move.i))
+            else:
+                self.add(Item(move.i))
+        else:
+            self.remove(Item(move.out))
+            self.add(Item(move.into))
+
+    def perturb(self: Self, ks: int = 1) -> None:
+        for _ in range(ks):
+            if (c := self.random_remove_move()) is not None:
+                self.remove(c)
+        for _ in range(ks):
+            if (c := self.random_add_move()) is not None:
+                self.add(c)
+
+    # The undo log maps every item changed since the checkpoint to its state
+    # at the checkpoint, so it never holds more than n entries.
+    def checkpoint(self: Self) -> dict[int, int]:
+        self.undo = {}
+        return self.undo
+
+    def rollback(self: Self, mark: dict[int, int]) -> None:
+        if mark is not self.undo:
+            raise ValueError("Rollback to a stale checkpoint")
+        for i, selected in mark.items():
+            if self.selected[i] != selected:
+                if selected:
+                    self.add(Item(i))
+                else:
+                    self.remove(Item(i))
+        mark.clear()
+        self.log = None
+
+    def heuristic_value(self: Self, component: Item) -> float:
+        return self.problem.values[component.i] / max(self.problem.weights[component.i], 1)
+
+    def heuristic_values(self: Self) -> tuple[Sequence[Item], np.ndarray]:
+        p, i = self.problem, self.__available()
+        return LazySequence(Item, i.tolist()), p.value_array[i] / np.maximum(p.weight_array[i], 1)
+
+    def objective_increment_local(self: Self, move: KnapsackMove) -> int:
+        values = self.problem.values
+        if isinstance(move, Flip):
+            return -values[move.i] if self.selected[move.i] else values[move.i]
+        return values[move.into] - values[move.out]
+
+    def objective_increment_add(self: Self, component: Item) -> int:
+        return self.problem.values[component.i]
+
+    def objective_increments_add(self: Self) -> tuple[Sequence[Item], np.ndarray]:
+        i = self.__available()
+        return LazySequence(Item, i.tolist()), self.problem.value_array[i]
+
+    def objective_increment_remove(self: Self, component: Item) -> int:
+        return -self.problem.values[component.i]
+
+    def upper_bound_increment_add(self: Self, component: Item) -> float:
+        p = self.problem
+        return p.values[component.i] - p.weights[component.i] * p.ratio
+
+    def upper_bound_increments_add(self: Self) -> tuple[Sequence[Item], np.ndarray]:
+        p, i = self.problem, self.__available()
+        return LazySequence(Item, i.tolist()), p.value_array[i] - p.weight_array[i] * p.ratio
+
+    def upper_bound_increment_remove(self: Self, component: Item) -> float:
+        return -self.upper_bound_increment_add(component)
+
+    def __available(self: Self) -> np.ndarray:
+        if np is None:
+            raise NotImplementedError
+        p = self.problem
+        free = np.frombuffer(self.selected, dtype=np.uint8) == 0
+        return (free & (p.weight_array <= p.capacity - self.weight)).nonzero()[0]
+
+    def __move(self: Self, k: int) -> Optional[KnapsackMove]:
+        p, residual = self.problem, self.problem.capacity - self.weight
+        i, j = divmod(k, p.n + 1)
+        if j == p.n:
+            if self.selected[i] or p.weights[i] <= residual:
+                return Flip(i)
+        elif self.selected[i] and not self.selected[j] and p.weights[j] - p.weights[i] <= residual:
+            return Swap(i, j)
+        return None
+
+    def __eq__(self: Self, other: object) -> bool:
+        return isinstance(other, KnapsackSolution) and self.selected == other.selected
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import random
+
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Iterator, Sequence, List, Tuple
+from typing_extensions import Self
+
+from .. import api
+from ..utils import MASK64, component_hash, shuffled, LazySequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from ..tests import objective_increment_local_test, objective_increment_add_test, invalidated_add_moves_test, objective_increments_local_test, batched_add_moves_test, checkpoint_rollback_test, dont_look_bits_test, fingerprint_test
+from ..tests.base import property_test
+
+@dataclass(frozen=True)
+class Vertex(api.Component):
+    v: int
+
+    def id(self: Self) -> int:
+        return self.v
+
+@dataclass(frozen=True)
+class Flip(api.LocalMove):
+    v: int
+
+Adjacency = List[List[Tuple[int, int]]]
+
+@property_test(objective_increment_local_test)
+@property_test(objective_increment_add_test)
+@property_test(invalidated_add_moves_test)
+@property_test(objective_increments_local_test)
+@property_test(batched_add_moves_test)
+@property_test(fingerprint_test)
+@property_test(checkpoint_rollback_test)
+@property_test(dont_look_bits_test)
+class MaxCut(api.Problem):
+    def __init__(self: Self, n: int, edges: Sequence[Tuple[int, int, int]]) -> None:
+        if any(w < 0 for _, _, w in edges):
+            raise ValueError("Edge weights must be non-negative")
+        self.n = n
+        self.edges = list(edges)
+        self.adjacency: Adjacency = [[] for _ in range(n)]
+        for u, v, w in edges:
+            self.adjacency[u].append((v, w))
+            self.adjacency[v].append((u, w))
+        self.degrees = [sum(w for _, w in a) for a in self.adjacency]
+        self.gains = array("q" if all(isinstance(w, int) for _, _, w in edges) else "d", self.degrees)
+        self.hashes = [component_hash(v) for v in range(n)]
+
+    @classmethod
+    def generate(cls: type[Self], n: int, degree: int = 8, seed: Optional[int] = None) -> Self:
+        rng = random.Random(seed)
+        edges, seen = [], set()
+        for _ in range(n * degree // 2):
+            u, v = rng.randrange(n), rng.randrange(n)
+            if u != v and (min(u, v), max(u, v)) not in seen:
+                seen.add((min(u, v), max(u, v)))
+                edges.append((u, v, rng.randint(1, 10)))
+        return cls(n, edges)
+
+    def empty_solution(self: Self) -> MaxCutSolution:
+        return MaxCutSolution(self)
+
+    def random_solution(self: Self, seed: Optional[int] = None) -> MaxCutSolution:
+        rng = random.Random(seed)
+        s = MaxCutSolution(self)
+        for v in range(self.n):
+            if rng.random() < 0.5:
+                s.add(Vertex(v))
+        return s
+
+# A solution is the side S of the cut; vertices start on the other side and
+# are added to S. gain[v] is the change in the cut weight when v changes side.
+# With non-negative weights gains only decrease as vertices are added, so the
+# sum of the positive gains outside S bounds what further adds can achieve.
+class MaxCutSolution(api.Solution[int, MaxCut, Vertex, Flip]):
+    def __init__(self: Self, problem: MaxCut) -> None:
+        self.problem = problem
+        self.side = bytearray(problem.n)
+        self.gain = problem.gains[:]
+        self.cut = 0
+        self.positive = sum(g for g in self.gain if g > 0)
+        self.key = 0
+        self.log: Optional[tuple[str, Vertex]] = None
+        self.undo: Optional[dict[int, int]] = None
+
+    def copy(self: Self) -> Self:
+        s = self.__class__.__new__(self.__class__)
+        s.problem = self.problem
+        s.side = self.side[:]
+        s.gain = self.gain[:]
+        s.cut = self.cut
+        s.positive = self.positive
+        s.key = self.key
+        s.log = self.log
+        s.undo = None
+        return s
+
+    def feasible(self: Self) -> bool:
+        return True
+
+    def objective(self: Self) -> int:
+        return self.cut
+
+    def fingerprint(self: Self) -> int:
+        return self.key
+
+    def upper_bound(self: Self) -> int:
+        return self.cut + self.positive
+
+    def components(self: Self) -> Iterator[Vertex]:
+        return (Vertex(v) for v in range(self.problem.n) if self.side[v])
+
+    def add_moves(self: Self) -> Iterator[Vertex]:
+        return (Vertex(v) for v in range(self.problem.n) if not self.side[v] and self.gain[v] > 0)
+
+    def invalidated_add_moves(self: Self) -> Optional[tuple[list[Vertex], list[Vertex]]]:
+        if self.log is None:
+            return None
+        kind, c = self.log
+        adjacency = self.problem.adjacency
+        affected = {c.v}
+        for u, _ in adjacency[c.v]:
+            affected.add(u)
+            affected.update(x for x, _ in adjacency[u])
+        removed, changed = [], []
+        for v in affected:
+            if not self.side[v] and self.gain[v] > 0:
+                changed.append(Vertex(v))
+            else:
+                removed.append(Vertex(v))
+        return removed, changed
+
+    def heuristic_add_moves(self: Self) -> Iterator[Vertex]:
+        return iter(sorted(self.add_moves(), key=lambda c: -self.gain[c.v]))
+
+    def heuristic_add_move(self: Self) -> Optional[Vertex]:
+        return max(self.add_moves(), key=self.heuristic_value, default=None)
+
+    def remove_moves(self: Self) -> Iterator[Vertex]:
+        return self.components()
+
+    def local_moves(self: Self) -> Iterator[Flip]:
+        return (Flip(v) for v in range(self.problem.n))
+
+    def random_local_moves_wor(self: Self) -> Iterator[Flip]:
+        return (Flip(v) for v in shuffled(self.problem.n))
+
+    def dlb_keys(self: Self) -> Iterator[int]:
+        return iter(range(self.problem.n))
+
+    def local_moves_at(self: Self, key: int) -> List[Flip]:
+        return [Flip(key)]
+
+    def touched(self: Self, move: Flip) -> Iterator[int]:
+        yield move.v
+        yield from (u for u, _ in self.problem.adjacency[move.v])
+
+    def random_add_move(self: Self) -> Optional[Vertex]:
+        moves = list(self.add_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_remove_move(self: Self) -> Optional[Vertex]:
+        moves = list(self.remove_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_local_move(self: Self) -> Optional[Flip]:
+        return Flip(random.randrange(self.problem.n)) if self.problem.n else None
+
+    def add(self: Self, component: Vertex) -> None:
+        self.__flip(component.v)
+        self.log = ("add", component)
+
+    def remove(self: Self, component: Vertex) -> None:
+        self.__flip(component.v)
+        self.log = ("remove", component)
+
+    def step(self: Self, move: Flip) -> None:
+        if self.side[move.v]:
+            self.remove(Vertex(move.v))
+        else:
+            self.add(Vertex(move.v))
+
+    def perturb(self: Self, ks: int = 1) -> None:
+        for _ in range(ks):
+            self.step(Flip(random.randrange(self.problem.n)))
+
+    # The undo log maps every vertex flipped since the checkpoint to its side
+    # at the checkpoint, so it never holds more than n entries.
+    def checkpoint(self: Self) -> dict[int, int]:
+        self.undo = {}
+        return self.undo
+
+    def rollback(self: Self, mark: dict[int, int]) -> None:
+        if mark is not self.undo:
+            raise ValueError("Rollback to a stale checkpoint")
+        for v, side in mark.items():
+            if self.side[v] != side:
+                self.__flip(v)
+        mark.clear()
+        self.log = None
+
+    def heuristic_value(self: Self, component: Vertex) -> int:
+        return self.gain[component.v]
+
+    def heuristic_values(self: Self) -> tuple[Sequence[Vertex], np.ndarray]:
+        return self.objective_increments_add()
+
+    def objective_increment_local(self: Self, move: Flip) -> int:
+        return self.gain[move.v]
+
+    def objective_increments_local(self: Self, moves: Sequence[Flip]) -> np.ndarray:
+        if np is None:
+            raise NotImplementedError
+        v = np.fromiter((m.v for m in moves), dtype=np.intp, count=len(moves))
+        return self.__gains()[v]
+
+    def objective_increment_add(self: Self, component: Vertex) -> int:
+        return self.gain[component.v]
+
+    def objective_increments_add(self: Self) -> tuple[Sequence[Vertex], np.ndarray]:
+        if np is None:
+            raise NotImplementedError
+        gain = self.__gains()
+        v = ((np.frombuffer(self.side, dtype=np.uint8) == 0) & (gain > 0)).nonzero()[0]
+        return LazySequence(Vertex, v.tolist()), gain[v]
+
+    # Zero-copy view of the gains for the batched methods
+    def __gains(self: Self) -> np.ndarray:
+        return np.frombuffer(self.gain, dtype=np.int64 if self.gain.typecode == "q" else np.float64)
+
+    def objective_increment_remove(self: Self, component: Vertex) -> int:
+        return self.gain[component.v]
+
+    def upper_bound_increment_add(self: Self, component: Vertex) -> int:
+        v, gain, side = component.v, self.gain, self.side
+        incr = gain[v] - max(0, gain[v])
+        for u, w in self.problem.adjacency[v]:
+            if not side[u]:
+                incr += max(0, gain[u] - 2 * w) - max(0, gain[u])
+        return incr
+
+    def upper_bound_increment_remove(self: Self, component: Vertex) -> int:
+        v, gain, side = component.v, self.gain, self.side
+        incr = gain[v] + max(0, -gain[v])
+        for u, w in self.problem.adjacency[v]:
+            if not side[u]:
+                incr += max(0, gain[u] + 2 * w) - max(0, gain[u])
+        return incr
+
+    def __flip(self: Self, v: int) -> None:
+        gain, side = self.gain, self.side
+        if self.undo is not None:
+            self.undo.setdefault(v, side[v])
+        g = gain[v]
+        if not side[v]:
+            self.positive -= max(0, g)
+        self.cut += g
+        gain[v] = -g
+        side[v] ^= 1
+        h = self.problem.hashes[v]
+        self.key = (self.key + h if side[v] else self.key - h) & MASK64
+        if not side[v]:
+            self.positive += max(0, -g)
+        for u, w in self.problem.adjacency[v]:
+            old = gain[u]
+            gain[u] += 2 * w if side[u] == side[v] else -2 * w
+            if not side[u]:
+                self.positive += max(0, gain[u]) - max(0, old)
+
+    def __eq__(self: Self, other: object) -> bool:
+        return isinstance(other, MaxCutSolution) and self.side == other.side
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import random
+
+from dataclasses import dataclass
+from typing import Optional, Iterator, Sequence, Union
+from typing_extensions import Self
+
+from .. import api
+from ..utils import MASK64, component_hash, shuffled, LazySequence
+from ..tests import objective_increment_local_test, objective_increment_add_test, invalidated_add_moves_test, batched_add_moves_test, fingerprint_test
+from ..tests.base import property_test
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+@dataclass(frozen=True)
+class Set(api.Component):
+    s: int
+
+    def id(self: Self) -> int:
+        return self.s
+
+@dataclass(frozen=True)
+class Drop(api.LocalMove):
+    s: int
+
+@dataclass(frozen=True)
+class Swap(api.LocalMove):
+    into: int
+    out: int
+
+SetCoverMove = Union[Drop, Swap]
+
+@property_test(objective_increment_local_test)
+@property_test(objective_increment_add_test)
+@property_test(invalidated_add_moves_test)
+@property_test(batched_add_moves_test)
+@property_test(fingerprint_test)
+class SetCover(api.Problem):
+    def __init__(self: Self, m: int, sets: Sequence[Sequence[int]], costs: Sequence[int]) -> None:
+        self.m = m
+        self.n = len(sets)
+        self.sets = [list(s) for s in sets]
+        self.members = [frozenset(s) for s in sets]
+        self.costs = list(costs)
+        self.covering: list[list[int]] = [[] for _ in range(m)]
+        for s, elements in enumerate(self.sets):
+            for e in elements:
+                self.covering[e].append(s)
+        if any(not len(c) for c in self.covering):
+            raise ValueError("Every element must be covered by some set")
+        self.hashes = [component_hash(s) for s in range(self.n)]
+        self.price = [min(self.costs[s] / len(self.sets[s]) for s in c) for c in self.covering]
+        if np is not None:
+            self.cost_array = np.array(self.costs, dtype=float)
+
+    @classmethod
+    def generate(cls: type[Self], m: int, n: Optional[int] = None, density: float = 0.02,
+                 seed: Optional[int] = None) -> Self:
+        rng = random.Random(seed)
+        n = m // 2 if n is None else n
+        k = max(1, round(density * m))
+        sets = [rng.sample(range(m), k) for _ in range(n)]
+        for e in range(m):
+            sets[rng.randrange(n)].append(e)
+        sets = [sorted(set(s)) for s in sets]
+        return cls(m, sets, [rng.randint(1, 100) for _ in range(n)])
+
+    def empty_solution(self: Self) -> SetCoverSolution:
+        return SetCoverSolution(self)
+
+    def random_solution(self: Self, seed: Optional[int] = None) -> SetCoverSolution:
+        rng = random.Random(seed)
+        s = SetCoverSolution(self)
+        for e in rng.sample(range(self.m), self.m):
+            if not s.count[e]:
+                s.add(Set(rng.choice(self.covering[e])))
+        return s
+
+# The objective is the negated cost. Each element is priced at the cheapest
+# cost per element among the sets covering it, so the prices of the uncovered
+# elements are a lower bound on the cost still needed to complete the cover.
+class SetCoverSolution(api.Solution[float, SetCover, Set, SetCoverMove]):
+    def __init__(self: Self, problem: SetCover) -> None:
+        self.problem = problem
+        self.selected = bytearray(problem.n)
+        self.count = [0] * problem.m
+        self.gain = [len(s) for s in problem.sets]
+        self.pgain = [sum(problem.price[e] for e in s) for s in problem.sets]
+        self.uncovered = problem.m
+        self.cost = 0
+        self.lb = sum(problem.price)
+        self.key = 0
+        self.log: Optional[tuple[str, Set, list[int]]] = None
+
+    def copy(self: Self) -> Self:
+        s = self.__class__.__new__(self.__class__)
+        s.problem = self.problem
+        s.selected = self.selected[:]
+        s.count = self.count[:]
+        s.gain = self.gain[:]
+        s.pgain = self.pgain[:]
+        s.uncovered = self.uncovered
+        s.cost = self.cost
+        s.lb = self.lb
+        s.key = self.key
+        s.log = self.log
+        return s
+
+    def feasible(self: Self) -> bool:
+        return self.uncovered == 0
+
+    def objective(self: Self) -> int:
+        return -self.cost
+
+    def fingerprint(self: Self) -> int:
+        return self.key
+
+    def upper_bound(self: Self) -> float:
+        return -(self.cost + self.lb)
+
+    def components(self: Self) -> Iterator[Set]:
+        return (Set(s) for s in range(self.problem.n) if self.selected[s])
+
+    def add_moves(self: Self) -> Iterator[Set]:
+        return (Set(s) for s in range(self.problem.n) if not self.selected[s] and self.gain[s] > 0)
+
+    def invalidated_add_moves(self: Self) -> Optional[tuple[list[Set], list[Set]]]:
+        if self.log is None:
+            return None
+        kind, c, flipped = self.log
+        affected = {c.s}
+        for e in flipped:
+            affected.update(self.problem.covering[e])
+        removed, changed = [], []
+        for s in affected:
+            if not self.selected[s] and self.gain[s] > 0:
+                changed.append(Set(s))
+            else:
+                removed.append(Set(s))
+        return removed, changed
+
+    # Adding a set only ever uncovers fewer elements for the others, so no
+    # add increment grows.
+    def submodular(self: Self) -> bool:
+        return True
+
+    def heuristic_add_moves(self: Self) -> Iterator[Set]:
+        return iter(sorted(self.add_moves(), key=lambda c: -self.heuristic_value(c)))
+
+    def heuristic_add_move(self: Self) -> Optional[Set]:
+        return max(self.add_moves(), key=self.heuristic_value, default=None)
+
+    def remove_moves(self: Self) -> Iterator[Set]:
+        return self.components()
+
+    def local_moves(self: Self) -> Iterator[SetCoverMove]:
+        n = self.problem.n
+        for k in range(n * (n + 1)):
+            if (move := self.__move(k)) is not None:
+                yield move
+
+    def drop_moves(self: Self) -> Iterator[Drop]:
+        n = self.problem.n
+        return (move for i in range(n) if (move := self.__move(i * (n + 1) + n)) is not None)
+
+    def swap_moves(self: Self) -> Iterator[Swap]:
+        n = self.problem.n
+        return (move for i in range(n) if self.selected[i]
+                for j in range(n) if (move := self.__move(i * (n + 1) + j)) is not None)
+
+    def random_local_moves_wor(self: Self) -> Iterator[SetCoverMove]:
+        n = self.problem.n
+        for k in shuffled(n * (n + 1)):
+            if (move := self.__move(k)) is not None:
+                yield move
+
+    def random_add_move(self: Self) -> Optional[Set]:
+        moves = list(self.add_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_remove_move(self: Self) -> Optional[Set]:
+        moves = list(self.remove_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_local_move(self: Self) -> Optional[SetCoverMove]:
+        return next(self.random_local_moves_wor(), None)
+
+    def add(self: Self, component: Set) -> None:
+        p, flipped = self.problem, []
+        self.selected[component.s] = 1
+        self.cost += p.costs[component.s]
+        self.key = (self.key + p.hashes[component.s]) & MASK64
+        for e in p.sets[component.s]:
+            self.count[e] += 1
+            if self.count[e] == 1:
+                flipped.append(e)
+                self.uncovered -= 1
+                self.lb -= p.price[e]
+                for s in p.covering[e]:
+                    self.gain[s] -= 1
+                    self.pgain[s] -= p.price[e]
+        self.log = ("add", component, flipped)
+
+    def remove(self: Self, component: Set) -> None:
+        p, flipped = self.problem, []
+        self.selected[component.s] = 0
+        self.cost -= p.costs[component.s]
+        self.key = (self.key - p.hashes[component.s]) & MASK64
+        for e in p.sets[component.s]:
+            self.count[e] -= 1
+            if self.count[e] == 0:
+                flipped.append(e)
+                self.uncovered += 1
+                self.lb += p.price[e]
+                for s in p.covering[e]:
+                    self.gain[s] += 1
+                    self.pgain[s] += p.price[e]
+        self.log = ("remove", component, flipped)
+
+    def step(self: Self, move: SetCoverMove) -> None:
+        if isinstance(move, Drop):
+            self.remove(Set(move.s))
+        else:
+            self.add(Set(move.into))
+            self.remove(Set(move.out))
+
+    def perturb(self: Self, ks: int = 1) -> None:
+        for _ in range(ks):
+            if (c := self.random_remove_move()) is not None:
+                self.remove(c)
+        while (c := self.random_add_move()) is not None:
+            self.add(c)
+
+    def heuristic_value(self: Self, component: Set) -> float:
+        return self.gain[component.s] / self.problem.costs[component.s]
+
+    def heuristic_values(self: Self) -> tuple[Sequence[Set], np.ndarray]:
+        s, gain = self.__available()
+        return LazySequence(Set, s.tolist()), gain[s] / self.problem.cost_array[s]
+
+    def objective_increment_local(self: Self, move: SetCoverMove) -> int:
+        costs = self.problem.costs
+        if isinstance(move, Drop):
+            return costs[move.s]
+        return costs[move.out] - costs[move.into]
+
+    def objective_increment_add(self: Self, component: Set) -> int:
+        return -self.problem.costs[component.s]
+
+    def objective_increments_add(self: Self) -> tuple[Sequence[Set], np.ndarray]:
+        s, _ = self.__available()
+        return LazySequence(Set, s.tolist()), -self.problem.cost_array[s]
+
+    def objective_increment_remove(self: Self, component: Set) -> int:
+        return self.problem.costs[component.s]
+
+    def upper_bound_increment_add(self: Self, component: Set) -> float:
+        return self.pgain[component.s] - self.problem.costs[component.s]
+
+    def upper_bound_increments_add(self: Self) -> tuple[Sequence[Set], np.ndarray]:
+        s, _ = self.__available()
+        return LazySequence(Set, s.tolist()), np.array(self.pgain)[s] - self.problem.cost_array[s]
+
+    def upper_bound_increment_remove(self: Self, component: Set) -> float:
+        p, count = self.problem, self.count
+        return p.costs[component.s] - sum(p.price[e] for e in p.sets[component.s] if count[e] == 1)
+
+    def __available(self: Self) -> tuple[np.ndarray, np.ndarray]:
+        if np is None:
+            raise NotImplementedError
+        gain = np.array(self.gain)
+        return ((np.frombuffer(self.selected, dtype=np.uint8) == 0) & (gain > 0)).nonzero()[0], gain
+
+    def __redundant(self: Self, s: int, into: Optional[int] = None) -> bool:
+        p, count = self.problem, self.count
+        if into is None:
+            return all(count[e] > 1 for e in p.sets[s])
+        covered = p.members[into]
+        return all(count[e] > 1 or e in covered for e in p.sets[s])
+
+    def __move(self: Self, k: int) -> Optional[SetCoverMove]:
+        p = self.problem
+        i, j = divmod(k, p.n + 1)
+        if not self.selected[i]:
+            return None
+        if j == p.n:
+            return Drop(i) if self.feasible() and self.__redundant(i) else None
+        if not self.selected[j] and self.feasible() and self.__redundant(i, j):
+            return Swap(j, i)
+        return None
+
+    def __eq__(self: Self, other: object) -> bool:
+        return isinstance(other, SetCoverSolution) and self.selected == other.selected
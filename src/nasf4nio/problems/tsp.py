@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import math
+import random
+
+from dataclasses import dataclass
+from typing import Optional, Iterator, Sequence, Tuple
+from typing_extensions import Self
+
+from .. import api
+from ..utils import MASK64, component_hash, shuffled, LazySequence
+from ..tests import objective_increment_local_test, objective_increments_local_test, batched_add_moves_test, dont_look_bits_test, fingerprint_test
+from ..tests.base import property_test
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+@dataclass(frozen=True)
+class Edge(api.Component):
+    u: int
+    v: int
+
+    def id(self: Self) -> Tuple[int, int]:
+        return (self.u, self.v) if self.u < self.v else (self.v, self.u)
+
+@dataclass(frozen=True)
+class TwoOpt(api.LocalMove):
+    i: int
+    j: int
+
+@property_test(objective_increment_local_test)
+@property_test(objective_increments_local_test)
+@property_test(batched_add_moves_test)
+@property_test(fingerprint_test)
+@property_test(dont_look_bits_test)
+class TSP(api.Problem):
+    def __init__(self: Self, coordinates: Sequence[Tuple[float, float]]) -> None:
+        self.n = len(coordinates)
+        self.coordinates = list(coordinates)
+        self.points = None if np is None else np.array(self.coordinates, dtype=float).reshape(-1, 2)
+
+    @classmethod
+    def generate(cls: type[Self], n: int, seed: Optional[int] = None) -> Self:
+        rng = random.Random(seed)
+        return cls([(rng.random(), rng.random()) for _ in range(n)])
+
+    def distance(self: Self, u: int, v: int) -> float:
+        return math.dist(self.coordinates[u], self.coordinates[v])
+
+    def empty_solution(self: Self) -> TSPSolution:
+        return TSPSolution(self)
+
+    def random_solution(self: Self, seed: Optional[int] = None) -> TSPSolution:
+        rng = random.Random(seed)
+        s = TSPSolution(self)
+        for v in rng.sample(range(1, self.n), self.n - 1):
+            s.add(Edge(s.path[-1], v))
+        return s
+
+# Tours start and end at city 0 and are built by appending cities to a path.
+# The objective is the negated length (of the closed tour once complete), and
+# by the triangle inequality closing the current path bounds any completion.
+class TSPSolution(api.Solution[float, TSP, Edge, TwoOpt]):
+    def __init__(self: Self, problem: TSP) -> None:
+        self.problem = problem
+        self.path = [0]
+        self.visited = bytearray(problem.n)
+        self.visited[0] = 1
+        self.length = 0.0
+        self.key = 0
+
+    def copy(self: Self) -> Self:
+        s = self.__class__.__new__(self.__class__)
+        s.problem = self.problem
+        s.path = self.path[:]
+        s.visited = self.visited[:]
+        s.length = self.length
+        s.key = self.key
+        return s
+
+    def feasible(self: Self) -> bool:
+        return len(self.path) == self.problem.n
+
+    def objective(self: Self) -> float:
+        if self.feasible():
+            return -(self.length + self.problem.distance(self.path[-1], self.path[0]))
+        return -self.length
+
+    def upper_bound(self: Self) -> float:
+        return -(self.length + self.problem.distance(self.path[-1], self.path[0]))
+
+    def fingerprint(self: Self) -> int:
+        return self.key
+
+    def components(self: Self) -> Iterator[Edge]:
+        return (Edge(u, v) for u, v in zip(self.path, self.path[1:]))
+
+    def add_moves(self: Self) -> Iterator[Edge]:
+        last = self.path[-1]
+        return (Edge(last, v) for v in range(self.problem.n) if not self.visited[v])
+
+    def heuristic_add_moves(self: Self) -> Iterator[Edge]:
+        return iter(sorted(self.add_moves(), key=lambda c: self.problem.distance(c.u, c.v)))
+
+    def heuristic_add_move(self: Self) -> Optional[Edge]:
+        return max(self.add_moves(), key=self.heuristic_value, default=None)
+
+    def remove_moves(self: Self) -> Iterator[Edge]:
+        if len(self.path) > 1:
+            yield Edge(self.path[-2], self.path[-1])
+
+    def local_moves(self: Self) -> Iterator[TwoOpt]:
+        if self.feasible():
+            n = self.problem.n
+            for i in range(1, n - 1):
+                for j in range(i + 1, n):
+                    yield TwoOpt(i, j)
+
+    def random_local_moves_wor(self: Self) -> Iterator[TwoOpt]:
+        if self.feasible():
+            m = self.problem.n - 1
+            for k in shuffled(m * m):
+                i, j = divmod(k, m)
+                if i < j:
+                    yield TwoOpt(i + 1, j + 1)
+
+    # Don't-look bits are kept per city. The moves at a city are those that
+    # remove one of its two tour edges, and a step touches the endpoints of
+    # the four edges it exchanges.
+    def dlb_keys(self: Self) -> Iterator[int]:
+        return iter(self.path) if self.feasible() else iter(())
+
+    def local_moves_at(self: Self, key: int) -> Iterator[TwoOpt]:
+        n, p = self.problem.n, self.path.index(key)
+        for k in ((p - 1) % n, p):
+            if 1 <= k + 1 <= n - 2:
+                yield from (TwoOpt(k + 1, j) for j in range(k + 2, n))
+            if 2 <= k <= n - 1:
+                yield from (TwoOpt(i, k) for i in range(1, k))
+
+    def touched(self: Self, move: TwoOpt) -> Tuple[int, int, int, int]:
+        path = self.path
+        return path[move.i - 1], path[move.i], path[move.j], path[(move.j + 1) % self.problem.n]
+
+    def random_add_move(self: Self) -> Optional[Edge]:
+        moves = list(self.add_moves())
+        return random.choice(moves) if len(moves) else None
+
+    def random_remove_move(self: Self) -> Optional[Edge]:
+        return next(self.remove_moves(), None)
+
+    def random_local_move(self: Self) -> Optional[TwoOpt]:
+        return next(self.random_local_moves_wor(), None)
+
+    def add(self: Self, component: Edge) -> None:
+        self.length += self.problem.distance(component.u, component.v)
+        self.key = (self.key + component_hash(component.id())) & MASK64
+        self.path.append(component.v)
+        self.visited[component.v] = 1
+
+    def remove(self: Self, component: Edge) -> None:
+        self.length -= self.problem.distance(component.u, component.v)
+        self.key = (self.key - component_hash(component.id())) & MASK64
+        self.path.pop()
+        self.visited[component.v] = 0
+
+    def step(self: Self, move: TwoOpt) -> None:
+        d, path = self.problem.distance, self.path
+        tour = self.length + d(path[-1], path[0]) - self.objective_increment_local(move)
+        a, b, c = path[move.i - 1], path[move.i], path[move.j]
+        key = self.key - component_hash(Edge(a, b).id()) + component_hash(Edge(a, c).id())
+        if move.j + 1 < len(path):
+            e = path[move.j + 1]
+            key += component_hash(Edge(b, e).id()) - component_hash(Edge(c, e).id())
+        self.key = key & MASK64
+        path[move.i:move.j + 1] = reversed(path[move.i:move.j + 1])
+        self.length = tour - d(path[-1], path[0])
+
+    def perturb(self: Self, ks: int = 1) -> None:
+        for _ in range(ks):
+            if (move := self.random_local_move()) is not None:
+                self.step(move)
+
+    def heuristic_value(self: Self, component: Edge) -> float:
+        return -self.problem.distance(component.u, component.v)
+
+    def heuristic_values(self: Self) -> tuple[Sequence[Edge], np.ndarray]:
+        moves, v = self.__available()
+        return moves, -self.__distances(self.path[-1], v)
+
+    def objective_increment_local(self: Self, move: TwoOpt) -> float:
+        d, path, n = self.problem.distance, self.path, self.problem.n
+        a, b, c, e = path[move.i - 1], path[move.i], path[move.j], path[(move.j + 1) % n]
+        return d(a, b) + d(c, e) - d(a, c) - d(b, e)
+
+    def objective_increments_local(self: Self, moves: Sequence[TwoOpt]) -> np.ndarray:
+        if np is None:
+            raise NotImplementedError
+        points, path = self.problem.points, np.array(self.path)
+        i = np.fromiter((m.i for m in moves), dtype=np.intp, count=len(moves))
+        j = np.fromiter((m.j for m in moves), dtype=np.intp, count=len(moves))
+        a, b, c, e = path[i - 1], path[i], path[j], path[(j + 1) % self.problem.n]
+        d = lambda u, v: np.hypot(*(points[u] - points[v]).T)
+        return d(a, b) + d(c, e) - d(a, c) - d(b, e)
+
+    def objective_increments_add(self: Self) -> tuple[Sequence[Edge], np.ndarray]:
+        moves, v = self.__available()
+        incrs = -self.__distances(self.path[-1], v)
+        if len(self.path) + 1 == self.problem.n:
+            incrs -= self.__distances(self.path[0], v)
+        return moves, incrs
+
+    def objective_increment_add(self: Self, component: Edge) -> float:
+        d = self.problem.distance
+        incr = -d(component.u, component.v)
+        if len(self.path) + 1 == self.problem.n:
+            incr -= d(component.v, self.path[0])
+        return incr
+
+    def objective_increment_remove(self: Self, component: Edge) -> float:
+        d = self.problem.distance
+        incr = d(component.u, component.v)
+        if self.feasible():
+            incr += d(component.v, self.path[0])
+        return incr
+
+    def upper_bound_increment_add(self: Self, component: Edge) -> float:
+        d, start = self.problem.distance, self.path[0]
+        return d(component.u, start) - d(component.u, component.v) - d(component.v, start)
+
+    def upper_bound_increments_add(self: Self) -> tuple[Sequence[Edge], np.ndarray]:
+        moves, v = self.__available()
+        last, start = self.path[-1], self.path[0]
+        return moves, self.problem.distance(last, start) - self.__distances(last, v) - self.__distances(start, v)
+
+    def upper_bound_increment_remove(self: Self, component: Edge) -> float:
+        return -self.upper_bound_increment_add(component)
+
+    def __available(self: Self) -> tuple[Sequence[Edge], np.ndarray]:
+        if np is None:
+            raise NotImplementedError
+        v = (np.frombuffer(self.visited, dtype=np.uint8) == 0).nonzero()[0]
+        last = self.path[-1]
+        return LazySequence(lambda u: Edge(last, u), v.tolist()), v
+
+    def __distances(self: Self, u: int, v: np.ndarray) -> np.ndarray:
+        points = self.problem.points
+        return np.hypot(*(points[v] - points[u]).T)
+
+    def __eq__(self: Self, other: object) -> bool:
+        return isinstance(other, TSPSolution) and self.path == other.path
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from array import array
+from collections.abc import Iterator
+from typing import Optional, Callable, Dict, Any
+from typing_extensions import Self
+
+from .api import Problem, Solution
+
+# Per-method statistics. Only sampled calls are timed, so totals are
+# extrapolated from the sampled ones.
+class Stats:
+    def __init__(self: Self) -> None:
+        self.calls = 0
+        self.sampled = 0
+        self.time = 0.0
+        self.allocated = 0
+        self.durations = array("d")
+
+    def record(self: Self, duration: float, allocated: int) -> None:
+        self.sampled += 1
+        self.time += duration
+        self.allocated += allocated
+        self.durations.append(duration)
+
+    def total(self: Self) -> float:
+        return self.time * self.calls / self.sampled if self.sampled else 0.0
+
+    def mean(self: Self) -> float:
+        return self.time / self.sampled if self.sampled else 0.0
+
+    def percentile(self: Self, q: float) -> float:
+        if not len(self.durations):
+            return 0.0
+        durations = sorted(self.durations)
+        return durations[min(len(durations) - 1, int(q * len(durations)))]
+
+    def as_dict(self: Self) -> dict:
+        return {"calls": self.calls, "sampled": self.sampled, "total": self.total(),
+                "mean": self.mean(), "p99": self.percentile(0.99),
+                "allocated": self.allocated * self.calls // self.sampled if self.sampled else 0}
+
+# Wraps solutions (or problems, whose solutions then come out wrapped) and
+# records how much time is spent in each of their public methods. The first
+# call of a method and every sample-th one after it are timed, the others
+# only counted, so that rarely called methods are never left out. Methods
+# that return iterators are charged for the time spent producing their items
+# too, and solutions they return (copy, for instance) are wrapped as well. With
+# allocations, the net memory allocated by sampled calls is recorded through
+# tracemalloc, which slows everything down considerably.
+#
+#   with Profiler() as profiler:
+#       solver(profiler.wrap(problem.random_solution()), timer)
+#   print(profiler.report())
+#
+# Solutions sent to worker processes are profiled there and their
+# statistics are lost, so profile serial runs only.
+class Profiler:
+    def __init__(self: Self, sample: int = 1, allocations: bool = False) -> None:
+        self.sample = max(1, sample)
+        self.allocations = allocations
+        self.stats: Dict[str, Stats] = {}
+        self.start: Optional[float] = None
+        self.wall = 0.0
+
+    def __enter__(self: Self) -> Self:
+        if self.allocations:
+            tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self: Self, *exc: Any) -> None:
+        self.wall += time.perf_counter() - self.start
+        self.start = None
+        if self.allocations:
+            tracemalloc.stop()
+
+    def wrap(self: Self, target: Any) -> Any:
+        if isinstance(target, (Profiled, ProfiledProblem)):
+            return target
+        if isinstance(target, Problem):
+            return ProfiledProblem(target, self)
+        return Profiled(target, self)
+
+    def elapsed(self: Self) -> float:
+        return self.wall if self.start is None else self.wall + time.perf_counter() - self.start
+
+    def method(self: Self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        stats = self.stats.setdefault(name, Stats())
+        sample, clock = self.sample, time.perf_counter
+        allocations = self.allocations
+        memory = tracemalloc.get_traced_memory
+        wrapped = self.__wrapped if name == "copy" else lambda result: result
+
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            stats.calls += 1
+            if (stats.calls - 1) % sample:
+                return wrapped(method(*args, **kwargs))
+            m = memory()[0] if allocations else 0
+            t = clock()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                stats.record(clock() - t, memory()[0] - m if allocations else 0)
+                raise
+            if isinstance(result, Iterator):
+                return self.__timed(result, stats, clock() - t, m)
+            stats.record(clock() - t, memory()[0] - m if allocations else 0)
+            return wrapped(result)
+        return profiled
+
+    def report(self: Self) -> str:
+        wall = self.elapsed()
+        rows = sorted(self.stats.items(), key=lambda item: -item[1].total())
+        callbacks = sum(s.total() for _, s in rows)
+        lines = [f"{'method':<32}{'calls':>10}{'total (s)':>12}{'mean (us)':>12}{'p99 (us)':>12}{'share':>8}"
+                 + (f"{'alloc (KiB)':>13}" if self.allocations else "")]
+        for name, s in rows:
+            line = (f"{name:<32}{s.calls:>10}{s.total():>12.4f}{s.mean() * 1e6:>12.2f}"
+                    f"{s.percentile(0.99) * 1e6:>12.2f}{s.total() / wall if wall > 0 else 0:>8.1%}")
+            if self.allocations:
+                line += f"{s.as_dict()['allocated'] / 1024:>13.1f}"
+            lines.append(line)
+        rest = max(0.0, wall - callbacks)
+        lines.append(f"{'(solver)':<32}{'':>10}{rest:>12.4f}{'':>12}{'':>12}"
+                     f"{rest / wall if wall > 0 else 0:>8.1%}")
+        lines.append(f"{'(wall)':<32}{'':>10}{wall:>12.4f}")
+        return "\n".join(lines)
+
+    def as_dict(self: Self) -> dict:
+        return {"wall": self.elapsed(), "methods": {name: s.as_dict() for name, s in self.stats.items()}}
+
+    def __wrapped(self: Self, result: Any) -> Any:
+        return Profiled(result, self) if isinstance(result, Solution) else result
+
+    def __timed(self: Self, it: Iterator, stats: Stats, duration: float, allocated: int) -> Iterator:
+        clock, allocations = time.perf_counter, self.allocations
+        memory = tracemalloc.get_traced_memory
+        try:
+            while True:
+                t = clock()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    duration += clock() - t
+                yield item
+        finally:
+            stats.record(duration, memory()[0] - allocated if allocations else 0)
+
+# Forwards everything to the wrapped solution, going through the profiler
+# for public methods, which are then kept in the instance dictionary so that
+# later lookups skip __getattr__. Attribute writes go to the solution.
+class Profiled:
+    def __init__(self: Self, solution: Any, profiler: Profiler) -> None:
+        object.__setattr__(self, "_solution", solution)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def __getattr__(self: Self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._solution, name)
+        if not callable(attr):
+            return attr
+        method = self._profiler.method(name, attr)
+        object.__setattr__(self, name, method)
+        return method
+
+    def __setattr__(self: Self, name: str, value: Any) -> None:
+        setattr(self._solution, name, value)
+
+    def __eq__(self: Self, other: object) -> bool:
+        return self._solution == (other._solution if isinstance(other, Profiled) else other)
+
+    def __repr__(self: Self) -> str:
+        return f"Profiled({self._solution!r})"
+
+    def __reduce__(self: Self) -> tuple:
+        return Profiled, (self._solution, self._profiler)
+
+    def unwrap(self: Self) -> Any:
+        return self._solution
+
+class ProfiledProblem:
+    __slots__ = ("_problem", "_profiler")
+
+    def __init__(self: Self, problem: Problem, profiler: Profiler) -> None:
+        self._problem = problem
+        self._profiler = profiler
+
+    def __getattr__(self: Self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self._problem, name)
+
+    def __reduce__(self: Self) -> tuple:
+        return ProfiledProblem, (self._problem, self._profiler)
+
+    def empty_solution(self: Self) -> Profiled:
+        return Profiled(self._problem.empty_solution(), self._profiler)
+
+    def random_solution(self: Self, seed: Optional[Any] = None) -> Profiled:
+        return Profiled(self._problem.random_solution(seed), self._profiler)
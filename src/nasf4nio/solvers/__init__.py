@@ -4,10 +4,12 @@ from .beam_search import BeamSearch
 
 from .first_improvement import FirstImprovement, DeterministicFirstImprovement
 from .best_improvement import BestImprovement
-from .ils import ILS
+from .ils import ILS, IslandILS
 from .rls import RLS
 from .simulated_annealing import SimulatedAnnealing
+from .parallel_tempering import ParallelTempering
 from .tabu_search import TabuSearch
+from .vns import VND, VNS
 
 from .grasp import GRASP
 from .mmas import MMAS
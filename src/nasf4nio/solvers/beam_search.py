@@ -1,25 +1,33 @@
 from __future__ import annotations
 
-import random
+import heapq
 
-from typing import TypeVar, Protocol, Optional, Iterable, List, Tuple, cast
+from typing import TypeVar, Protocol, Optional, Iterable, Iterator, Hashable, List, Tuple, Any, cast
 from typing_extensions import Self
 
 from operator import itemgetter
 
+from ..utils import MASK64, component_hash, fingerprint, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
+
 class ComparableAndAddable(Protocol): 
     def __lt__(self: Self, other: Self) -> bool: ...
     def __add__(self: Self, other: Self) -> Self: ...
         
 T = TypeVar("T", bound=ComparableAndAddable, covariant=True)
 
-Component = TypeVar("Component")
+class ComponentProtocol(Protocol):
+    def id(self: Self) -> Hashable: ...
+
+Component = TypeVar("Component", bound=ComponentProtocol)
 
 class Comparable(Protocol): 
     def __lt__(self: Self, other: Self) -> bool: ...
         
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol) 
 
@@ -28,36 +36,87 @@ class SolutionProtocol(Protocol[T, Component]):
     def objective(self: Self) -> Optional[T]: ...
     def upper_bound(self: Self) -> Optional[T]: ...
     def feasible(self) -> bool: ...
+    def components(self) -> Iterable[Component]: ...
     def add_moves(self) -> Iterable[Component]: ...
     def upper_bound_increment_add(self, component: Component) -> Optional[T]: ...
     def add(self, component: Component) -> None: ...
     
 Solution = TypeVar("Solution", bound=SolutionProtocol)  
-BeamList = List[Tuple[T, Solution]]
+BeamList = List[Tuple[T, Solution, Optional[int]]]
+Candidate = Tuple[T, Solution, Component, Optional[int]]
 
 class BeamSearch:
-    def __init__(self: Self, bw: Optional[int] = 10) -> None:
+    def __init__(self: Self, bw: Optional[int] = 10, unique: bool = False,
+                 observer: Optional[Observer] = None) -> None:
         self.bw = bw 
+        self.unique = unique
+        self.observer = observer
     
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
         best, bobjv = ((solution, solution.objective() ) if solution.feasible() else (None, None))
-        beam: BeamList = [(solution.upper_bound(), solution)]
+        key = fingerprint(c.id() for c in solution.components()) if self.unique else None
+        beam: BeamList = [(solution.upper_bound(), solution, key)]
         while not timer.finished():
-            candidates = []
-            for ub, s in beam:
-                for c in s.add_moves():
-                    candidates.append((ub + cast(T, s.upper_bound_increment_add(c)), s, c))
-            if not len(candidates):
+            if self.bw is None:
+                selected = sorted(self.__expand(beam, timer), reverse=True, key=itemgetter(0))
+            elif self.unique:
+                selected = self.__select(beam, timer)
+            else:
+                selected = heapq.nlargest(self.bw, self.__expand(beam, timer), key=itemgetter(0))
+            if not len(selected):
                 break
-            candidates.sort(reverse=True, key=itemgetter(0))
             beam: BeamList = []
-            for ub, s, c in candidates[:self.bw]:
+            for ub, s, c, key in selected:
                 s: Solution = s.copy()
                 s.add(c)
                 if s.feasible():
                     obj = cast(T, s.objective())
                     if bobjv is None or obj > bobjv:
                         best, bobjv = s, obj
-                beam.append((ub, s))
+                        if self.observer is not None:
+                            self.observer(INCUMBENT, objective=bobjv)
+                beam.append((ub, s, key))
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=bobjv)
         return best
- 
\ No newline at end of file
+
+    def __expand(self: Self, beam: BeamList, timer: Timer) -> Iterator[Candidate]:
+        if not self.unique:
+            for ub, s, _ in beam:
+                for c in s.add_moves():
+                    timer.evaluated()
+                    yield (ub + cast(T, s.upper_bound_increment_add(c)), s, c, None)
+            return
+        seen = set()
+        for ub, s, key in beam:
+            for c in s.add_moves():
+                k = (cast(int, key) + component_hash(c.id())) & MASK64
+                if k not in seen:
+                    seen.add(k)
+                    timer.evaluated()
+                    yield (ub + cast(T, s.upper_bound_increment_add(c)), s, c, k)
+
+    # Bounded top-k selection without duplicates. Only the keys of the
+    # candidates in the heap are kept: an evicted candidate had a bound no
+    # larger than the new minimum, so it cannot get back in if seen again.
+    def __select(self: Self, beam: BeamList, timer: Timer) -> List[Candidate]:
+        heap: List[Tuple[T, int, Candidate]] = []
+        keys = set()
+        order = 0
+        for ub, s, key in beam:
+            for c in s.add_moves():
+                k = (cast(int, key) + component_hash(c.id())) & MASK64
+                if k in keys:
+                    continue
+                timer.evaluated()
+                bound = ub + cast(T, s.upper_bound_increment_add(c))
+                order -= 1
+                if len(heap) < cast(int, self.bw):
+                    heapq.heappush(heap, (bound, order, (bound, s, c, k)))
+                    keys.add(k)
+                elif len(heap) and bound > heap[0][0]:
+                    keys.discard(heapq.heapreplace(heap, (bound, order, (bound, s, c, k)))[2][3])
+                    keys.add(k)
+        return [candidate for _, _, candidate in sorted(heap, reverse=True)]
@@ -1,32 +1,50 @@
 from __future__ import annotations
 
-from typing import cast, TypeVar, Protocol, Optional, Iterable, Any
+from typing import cast, TypeVar, Protocol, Optional, Iterable, Sequence, Any
 from typing_extensions import Self
 
+from ..utils import blocks, implemented, tracked
+from ..observers import Observer, INCUMBENT
+
 T = TypeVar('T')
 LocalMove = TypeVar('LocalMove')
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol) 
 
 class SolutionProtocol(Protocol[T, LocalMove]):
+    def objective(self: Self) -> Optional[T]: ...
     def step(self: Self, move: LocalMove) -> None: ...
     def local_moves(self: Self) -> Iterable[LocalMove]: ...
     def objective_increment_local(self, move: LocalMove) -> Optional[T]: ...
 
+# Optional. Returns the increments of a block of moves as an array (anything
+# supporting argmax(), nonzero() and indexing, such as a NumPy array).
+class BatchProtocol(Protocol[LocalMove]):
+    def objective_increments_local(self: Self, moves: Sequence[LocalMove]) -> Any: ...
+
 Solution = TypeVar('Solution', bound=SolutionProtocol)
 
 class BestImprovement: 
-    def __init__(self: Self, zero: Any = 0) -> None:
+    def __init__(self: Self, zero: Any = 0, block: int = 1024,
+                 observer: Optional[Observer] = None) -> None:
         self.zero = zero
+        self.block = block
+        self.observer = observer
     
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
-        while timer.finished():
+        timer = tracked(timer)
+        if implemented(getattr(solution, "objective_increments_local", None), []):
+            return self.__search(solution, timer)
+        while not timer.finished():
             bincr, bmove = self.zero, None
             for move in solution.local_moves():
                 incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
                 if incr > bincr:
                     bincr = incr
                     bmove = move
@@ -36,4 +54,26 @@ class BestImprovement:
                 break
             else:
                 solution.step(bmove)
-        return solution
\ No newline at end of file
+                timer.iterated(solution.objective())
+                if self.observer is not None:
+                    self.observer(INCUMBENT, objective=solution.objective())
+        return solution
+
+    def __search(self: Self, solution: Solution, timer: Timer) -> Solution:
+        while not timer.finished():
+            bincr, bmove = self.zero, None
+            for moves in blocks(solution.local_moves(), self.block):
+                incrs = solution.objective_increments_local(moves)
+                timer.evaluated(len(moves))
+                i = int(incrs.argmax())
+                if incrs[i] > bincr:
+                    bincr, bmove = incrs[i], moves[i]
+                if timer.finished():
+                    break
+            if bmove is None:
+                break
+            solution.step(bmove)
+            timer.iterated(solution.objective())
+            if self.observer is not None:
+                self.observer(INCUMBENT, objective=solution.objective())
+        return solution
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import TypeVar, Protocol, Optional, Iterable, Iterator, Hashable, Callable, Sequence, Tuple, Union, Dict, List, Any, cast
+from typing_extensions import Self
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..utils import provided
+
+T = TypeVar("T")
+
+class ComponentProtocol(Protocol):
+    def id(self: Self) -> Hashable: ...
+
+Component = TypeVar("Component", bound=ComponentProtocol)
+
+# invalidated_add_moves() reports the effect of the most recent add/remove as a
+# pair (removed, changed): add moves that are no longer available (including
+# the component that was just added) and add moves that are new or whose
+# increment may have changed. Returning None requests a full rescan.
+class SolutionProtocol(Protocol[Component]):
+    def add_moves(self: Self) -> Iterable[Component]: ...
+    def invalidated_add_moves(self: Self) -> Optional[Tuple[Iterable[Component], Iterable[Component]]]: ...
+
+Solution = TypeVar("Solution", bound=SolutionProtocol)
+
+# A batch scorer returns all add moves and their scores as aligned sequences,
+# the scores as an array (e.g. upper_bound_increments_add()). When the
+# solution implements it, it replaces the per-move scoring of the full scans
+# and the candidates are kept as (moves, scores); solvers check batched to use
+# array operations.
+#
+# Together with invalidated_add_moves(), the arrays are updated in place once
+# a construction has made steady steps, each changing at most a sixteenth of
+# the moves: the changed moves are scored one at a time and removed moves are
+# replaced by the last one, so the order of the arrays is arbitrary. Turning
+# the batch into a list and an index costs as much as many batches, so short
+# constructions and steps that change many moves still rescore everything,
+# and after such steps invalidated_add_moves() is not even asked for a number
+# of steps that doubles while they keep coming.
+Batch = Callable[[], Tuple[Sequence[Component], Any]]
+
+class CandidateList:
+    steady = 8
+
+    def __init__(self: Self, solution: Solution, score: Callable[[Component], T],
+                 batch: Optional[Batch] = None) -> None:
+        self.solution = solution
+        self.score = score
+        self.batch = batch
+        self.evaluations = 0
+        self.incremental = provided(solution, "invalidated_add_moves")
+        try:
+            first = None if batch is None else batch()
+        except NotImplementedError:
+            first = None
+        self.batched = first is not None
+        self.steps = self.skip = self.backoff = 0
+        self.refresh(first)
+
+    def __len__(self: Self) -> int:
+        return len(self.moves) if self.batched else len(self.candidates)
+
+    def __iter__(self: Self) -> Iterator[Tuple[T, Component]]:
+        if self.batched:
+            return zip(self.scores, self.moves)
+        return iter(self.candidates.values() if self.incremental else self.candidates)
+
+    def refresh(self: Self, batch: Optional[Tuple[Sequence[Component], Any]] = None) -> None:
+        score = self.score
+        if self.batched:
+            self.moves, self.scores = cast(Batch, self.batch)() if batch is None else batch
+            self.index: Optional[Dict[Hashable, int]] = None
+            self.evaluations += len(self.moves)
+            return
+        if self.incremental:
+            self.candidates: Union[Dict[Hashable, Tuple[T, Component]], List[Tuple[T, Component]]] = \
+                {c.id(): (score(c), c) for c in self.solution.add_moves()}
+        else:
+            self.candidates = [(score(c), c) for c in self.solution.add_moves()]
+        self.evaluations += len(self.candidates)
+
+    def update(self: Self) -> None:
+        if self.batched and self.skip > 0:
+            self.skip -= 1
+            self.refresh()
+            return
+        if not self.incremental or (delta := self.solution.invalidated_add_moves()) is None:
+            self.refresh()
+            return
+        removed, changed = delta
+        score = self.score
+        if self.batched:
+            self.__update_batch(removed, list(changed))
+            return
+        candidates = self.candidates
+        for c in removed:
+            candidates.pop(c.id(), None)
+        for c in changed:
+            candidates[c.id()] = (score(c), c)
+            self.evaluations += 1
+
+    def __update_batch(self: Self, removed: Iterable[Component], changed: List[Component]) -> None:
+        if len(changed) <= len(self.moves) // 16:
+            self.steps, self.backoff = self.steps + 1, 0
+        else:
+            self.steps, self.backoff = 0, min(2 * self.backoff + 1, 64)
+            self.skip = self.backoff
+        if self.steps < self.steady:
+            self.refresh()
+            return
+        if self.index is None:
+            self.moves = list(self.moves)
+            self.buffer = np.array(self.scores, dtype=np.float64)
+            self.index = {c.id(): i for i, c in enumerate(self.moves)}
+        for c in removed:
+            self.__discard(c.id())
+        for c in changed:
+            self.evaluations += 1
+            if (value := self.score(c)) is None:
+                self.__discard(c.id())
+            else:
+                self.__put(c, value)
+        self.scores = self.buffer[:len(self.moves)]
+
+    def __put(self: Self, c: Component, value: T) -> None:
+        if (i := self.index.get(c.id())) is None:
+            i = self.index[c.id()] = len(self.moves)
+            self.moves.append(c)
+            if i == len(self.buffer):
+                self.buffer = np.concatenate((self.buffer, np.empty(max(1, i), dtype=self.buffer.dtype)))
+        else:
+            self.moves[i] = c
+        self.buffer[i] = value
+
+    def __discard(self: Self, key: Hashable) -> None:
+        if (i := self.index.pop(key, None)) is None:
+            return
+        last = self.moves.pop()
+        if i < len(self.moves):
+            self.moves[i] = last
+            self.buffer[i] = self.buffer[len(self.moves)]
+            self.index[last.id()] = i
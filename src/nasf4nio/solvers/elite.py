@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import random
+
+from typing import cast, TypeVar, Protocol, Optional, Iterable, Hashable, Callable, FrozenSet, List, Tuple, Any
+from typing_extensions import Self
+
+from ..utils import Incumbent, tracked
+
+Component = TypeVar("Component")
+
+class Comparable(Protocol):
+    def __lt__(self: Self, other: Self) -> bool: ...
+
+T = TypeVar("T", bound=Comparable, covariant=True)
+
+class TimerProtocol(Protocol):
+    def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+
+Timer = TypeVar('Timer', bound=TimerProtocol)
+
+# Relinking walks between solutions with add and remove, so it only suits
+# problems whose solutions are sets of components.
+class SolutionProtocol(Protocol[T, Component]):
+    def copy(self: Self) -> Self: ...
+    def feasible(self: Self) -> bool: ...
+    def objective(self: Self) -> Optional[T]: ...
+    def components(self: Self) -> Iterable[Component]: ...
+    def add(self: Self, component: Component) -> None: ...
+    def remove(self: Self, component: Component) -> None: ...
+    def objective_increment_add(self: Self, component: Component) -> Optional[T]: ...
+    def objective_increment_remove(self: Self, component: Component) -> Optional[T]: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+Member = Tuple[T, Solution, FrozenSet[Hashable]]
+
+# Bounded pool of good, mutually distant solutions, where the distance is the
+# size of the symmetric difference of their component ids. A full pool only
+# admits solutions better than its worst member, which replace the most
+# similar worse member.
+class ElitePool:
+    def __init__(self: Self, size: int = 10, diversity: int = 1) -> None:
+        self.size = size
+        self.diversity = diversity
+        self.members: List[Member] = []
+
+    def __len__(self: Self) -> int:
+        return len(self.members)
+
+    def add(self: Self, solution: Solution) -> bool:
+        obj = cast(T, solution.objective())
+        key = frozenset(cast(Any, c).id() for c in solution.components())
+        distances = [len(key ^ k) for _, _, k in self.members]
+        if any(d == 0 for d in distances):
+            return False
+        better = not len(self.members) or obj > max(o for o, _, _ in self.members)
+        if not better and any(d < self.diversity for d in distances):
+            return False
+        if len(self.members) < self.size:
+            self.members.append((obj, solution, key))
+            return True
+        worse = [i for i, (o, _, _) in enumerate(self.members) if o < obj]
+        if not len(worse):
+            return False
+        self.members[min(worse, key=distances.__getitem__)] = (obj, solution, key)
+        return True
+
+    # Relinks solution with a random member, improves the result with
+    # local_search if given and returns whichever of the two is better after
+    # adding it to the pool.
+    def relink_and_add(self: Self, solution: Solution, obj: T, timer: Timer, rng: Any = random,
+                       local_search: Optional[Callable[[Solution], Optional[Solution]]] = None) -> Tuple[Solution, T]:
+        if len(self.members):
+            r = relink(solution, self.sample(rng), timer)
+            if r is not None and local_search is not None:
+                r = local_search(r)
+            if r is not None and r.feasible() and (robj := cast(T, r.objective())) > obj:
+                solution, obj = r, robj
+        self.add(solution)
+        return solution, obj
+
+    def sample(self: Self, rng: Any = random) -> Solution:
+        return rng.choice(self.members)[1]
+
+    def best(self: Self) -> Optional[Solution]:
+        return max(self.members, key=lambda m: m[0])[1] if len(self.members) else None
+
+# Greedy walk from source to target, applying the best remaining add or
+# remove at each step. Returns the best feasible solution strictly between
+# them if it beats both, and None otherwise.
+def relink(source: Solution, target: Solution, timer: Timer) -> Optional[Solution]:
+    timer = tracked(timer)
+    s = source.copy()
+    ids = {cast(Any, c).id() for c in target.components()}
+    own = {cast(Any, c).id() for c in s.components()}
+    adds = [c for c in target.components() if cast(Any, c).id() not in own]
+    removes = [c for c in s.components() if cast(Any, c).id() not in ids]
+    best, bobj = None, max(cast(T, source.objective()), cast(T, target.objective()))
+    while len(adds) + len(removes) > 1 and not timer.finished():
+        moves = ([(s.objective_increment_add(c), i, True) for i, c in enumerate(adds)] +
+                 [(s.objective_increment_remove(c), i, False) for i, c in enumerate(removes)])
+        timer.evaluated(len(moves))
+        _, i, add = max(moves, key=lambda m: m[0])
+        if add:
+            s.add(adds[i])
+            adds[i] = adds[-1]
+            adds.pop()
+        else:
+            s.remove(removes[i])
+            removes[i] = removes[-1]
+            removes.pop()
+        if s.feasible() and (obj := cast(T, s.objective())) > bobj:
+            bobj = obj
+            if best is None:
+                best = Incumbent(s)
+            else:
+                best.save()
+    return None if best is None else best.result()
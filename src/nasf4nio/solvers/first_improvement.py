@@ -1,27 +1,39 @@
 from __future__ import annotations
 
-from typing import cast, TypeVar, Protocol, Optional, Iterable, Any
+from collections import deque
+
+from typing import cast, TypeVar, Protocol, Optional, Iterable, Sequence, Hashable, Any
 from typing_extensions import Self
 
+from ..utils import blocks, implemented, provided, tracked
+from ..observers import Observer, INCUMBENT
+
 T = TypeVar('T')
 LocalMove = TypeVar('LocalMove')
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol) 
     
 class FirstImprovement:
-    def __init__(self: Self, zero: Optional[Any] = 0) -> None:
+    def __init__(self: Self, zero: Optional[Any] = 0, observer: Optional[Observer] = None) -> None:
         self.zero = zero
+        self.observer = observer
     
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
         while not timer.finished():
             for move in solution.random_local_moves_wor():
                 incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
                 if incr > self.zero:
                     solution.step(move)
-                    print(solution.score())
+                    timer.iterated(solution.objective())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=solution.objective())
                     return solution
                 if timer.finished():
                     return solution
@@ -30,6 +42,7 @@ class FirstImprovement:
         return solution
 
     class SolutionProtocol(Protocol[T, LocalMove]):
+        def objective(self: Self) -> Optional[T]: ...
         def step(self: Self, move: LocalMove) -> None: ...
         def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
         def random_local_moves_wor(self: Self) -> Iterable[LocalMove]: ...
@@ -37,15 +50,27 @@ class FirstImprovement:
     Solution = TypeVar("Solution", bound=SolutionProtocol)
      
 class DeterministicFirstImprovement:
-    def __init__(self: Self, zero: Any = 0) -> None:
+    def __init__(self: Self, zero: Any = 0, block: int = 256,
+                 observer: Optional[Observer] = None) -> None:
         self.zero = zero
+        self.block = block
+        self.observer = observer
     
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        if provided(solution, "dlb_keys"):
+            return self.__dlb(solution, timer)
+        if implemented(getattr(solution, "objective_increments_local", None), []):
+            return self.__search(solution, timer)
         while not timer.finished():
             for move in solution.local_moves():
                 incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
                 if incr > self.zero:
                     solution.step(move)
+                    timer.iterated(solution.objective())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=solution.objective())
                     break
                 if timer.finished():
                     return solution
@@ -53,9 +78,67 @@ class DeterministicFirstImprovement:
                 break
         return solution
 
+    def __search(self: Self, solution: Solution, timer: Timer) -> Solution:
+        while not timer.finished():
+            for moves in blocks(solution.local_moves(), self.block):
+                incrs = solution.objective_increments_local(moves)
+                timer.evaluated(len(moves))
+                improving = (incrs > self.zero).nonzero()[0]
+                if len(improving):
+                    solution.step(moves[improving[0]])
+                    timer.iterated(solution.objective())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=solution.objective())
+                    break
+                if timer.finished():
+                    return solution
+            else:
+                break
+        return solution
+
+    # Keys whose moves were all non-improving are left out of the queue until
+    # a step touches them again; the search ends when the queue is empty.
+    def __dlb(self: Self, solution: Solution, timer: Timer) -> Solution:
+        batched = implemented(getattr(solution, "objective_increments_local", None), [])
+        queue = deque(solution.dlb_keys())
+        active = set(queue)
+        while len(queue) and not timer.finished():
+            key = queue.popleft()
+            active.discard(key)
+            moves = list(solution.local_moves_at(key))
+            if batched:
+                improving = (solution.objective_increments_local(moves) > self.zero).nonzero()[0]
+                timer.evaluated(len(moves))
+                move = moves[improving[0]] if len(improving) else None
+            else:
+                move = None
+                for m in moves:
+                    timer.evaluated()
+                    if cast(T, solution.objective_increment_local(m)) > self.zero:
+                        move = m
+                        break
+            if move is not None:
+                solution.step(move)
+                timer.iterated(solution.objective())
+                if self.observer is not None:
+                    self.observer(INCUMBENT, objective=solution.objective())
+                for k in solution.touched(move):
+                    if k not in active:
+                        active.add(k)
+                        queue.append(k)
+        return solution
+
     class SolutionProtocol(Protocol[T, LocalMove]):
+        def objective(self: Self) -> Optional[T]: ...
         def step(self: Self, move: LocalMove) -> None: ...
         def local_moves(self: Self) -> Iterable[LocalMove]: ... 
         def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
+        # Optional, see BestImprovement
+        def objective_increments_local(self: Self, moves: Sequence[LocalMove]) -> Any: ...
+        # Optional, don't-look bits: the keys, the moves at a key and the keys
+        # whose bits a step of move resets
+        def dlb_keys(self: Self) -> Iterable[Hashable]: ...
+        def local_moves_at(self: Self, key: Hashable) -> Iterable[LocalMove]: ...
+        def touched(self: Self, move: LocalMove) -> Iterable[Hashable]: ...
 
     Solution = TypeVar("Solution", bound=SolutionProtocol)
\ No newline at end of file
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import random
-import logging
 
-from typing import TypeVar, Protocol, Optional, Iterable, TypedDict, cast
+from concurrent.futures import ProcessPoolExecutor
+
+from typing import TypeVar, Protocol, Optional, Iterable, TypedDict, Any, cast
 from typing_extensions import Self, Unpack
 
 from itertools import islice
 from operator import itemgetter
 
+from .candidates import CandidateList
+from .elite import ElitePool
+from ..utils import Incumbent, LRUCache, cached_search, spawn, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
+
 Component = TypeVar("Component")
 
 class Comparable(Protocol): 
@@ -32,7 +38,10 @@ class LocalSearchProtocol(Protocol[Solution]):
 LocalSearch = TypeVar('LocalSearch', bound=LocalSearchProtocol)
         
 class TimerProtocol(Protocol):
+    evaluations: int
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol)
 
@@ -40,50 +49,121 @@ class GRASP:
     def __init__(self: Self, alpha: Optional[float] = 0.1,
                  seed: Optional[int] = None,
                  local_search: Optional[LocalSearch] = None, 
+                 n_jobs: Optional[int] = None,
+                 elite: Optional[int] = None,
+                 diversity: int = 1,
+                 cache: Optional[int] = None,
+                 observer: Optional[Observer] = None,
                  **kwargs: Unpack[TypedDict]) -> None:
         self.alpha = alpha
         self.seed = seed
         self.local_search = local_search
+        self.n_jobs = n_jobs
+        self.elite = elite
+        self.diversity = diversity
+        self.cache = cache
+        self.results: Optional[LRUCache] = None
+        self.observer = observer
         self.kwargs = kwargs 
-        
-        if seed is not None:
-            random.seed(seed)
+        self.rng = random.Random(seed)
 
         self.__filter = self.__threshold if alpha else self.__no_threshold
          
+    def __getstate__(self: Self) -> dict:
+        state = self.__dict__.copy()
+        del state["_GRASP__filter"]
+        state["observer"] = None
+        state["results"] = None
+        return state
+
+    def __setstate__(self: Self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__filter = self.__threshold if self.alpha else self.__no_threshold
+
     def __call__(self: Self, solution: Solution, timer: Timer) -> Optional[Solution]:
+        timer = tracked(timer)
+        if self.n_jobs is not None and self.n_jobs > 1:
+            return self.__parallel(solution, timer)
+        self.results = None if self.cache is None else LRUCache(self.cache)
         best, bobjv = None, None
+        pool = None if self.elite is None else ElitePool(self.elite, self.diversity)
+        improve = None if self.local_search is None else self.__improve
         while not timer.finished():
             s = solution.copy()
-            b, bobj = (s.copy(), s.objective()) if s.feasible() else (None, None)
-            candidates = [(cast(T, s.upper_bound_increment_add(c)), c) for c in s.add_moves()]
+            b, bobj = (Incumbent(s), s.objective()) if s.feasible() else (None, None)
+            candidates = CandidateList(s, s.upper_bound_increment_add,
+                                       getattr(s, "upper_bound_increments_add", None))
             while len(candidates) != 0:
                 c = self.__filter(candidates)
                 s.add(c)
                 if s.feasible():
                     obj = cast(T, s.objective())
                     if bobj is None or obj > bobj:
-                        b, bobj = s.copy(), obj
-                        logging.debug(f"SCORE: {bobj}")
-                candidates = [(cast(T, s.upper_bound_increment_add(c)), c) for c in s.add_moves()]
+                        if b is None:
+                            b = Incumbent(s)
+                        else:
+                            b.save()
+                        bobj = obj
+                candidates.update()
+            timer.evaluated(candidates.evaluations)
             if b is not None:
+                b = b.result()
                 if self.local_search is not None:
-                    b = cast(Solution, self.local_search(b, **self.kwargs))
+                    b = cast(Solution, cached_search(self.results, self.local_search, b, **self.kwargs))
                     if b is not None and b.feasible():
                         bobj = cast(T, b.objective()) 
+                if pool is not None and b is not None and b.feasible():
+                    b, bobj = pool.relink_and_add(b, bobj, timer, self.rng, improve)
                 if bobjv is None or bobj > bobjv:
                     best, bobjv = b, bobj
-                    logging.debug(f"BEST SCORE: {bobj}")
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=bobjv)
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=bobjv)
+        return best
+
+    def __improve(self: Self, solution: Solution) -> Optional[Solution]:
+        return cached_search(self.results, self.local_search, solution, **self.kwargs)
+
+    def __parallel(self: Self, solution: Solution, timer: Timer) -> Optional[Solution]:
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+            results = list(pool.map(_search, [self] * self.n_jobs, [solution] * self.n_jobs,
+                                    [timer] * self.n_jobs, spawn(self.rng, self.n_jobs)))
+        best, bobjv = None, None
+        for b, evaluations in results:
+            timer.evaluated(evaluations)
+            if b is not None and b.feasible():
+                obj = cast(T, b.objective())
+                if bobjv is None or obj > bobjv:
+                    best, bobjv = b, obj
+        if self.observer is not None and best is not None:
+            self.observer(INCUMBENT, objective=bobjv)
         return best
      
-    def __threshold(self: Self, candidates: list[tuple[T, Component]]) -> Component: 
+    def __threshold(self: Self, candidates: CandidateList) -> Component: 
+        if candidates.batched:
+            scores = candidates.scores
+            cmin, cmax = scores.min(), scores.max()
+            rcl = (scores <= cmin + self.alpha * (cmax - cmin)).nonzero()[0]
+            return candidates.moves[rcl[self.rng.randrange(len(rcl))]]
         cmin = min(candidates, key=itemgetter(0))[0]
         cmax = max(candidates, key=itemgetter(0))[0]
         thresh = cmin + self.alpha * (cmax - cmin)
         rcl = [c for decr, c in candidates if decr <= thresh]
-        return random.choice(rcl)
+        return self.rng.choice(rcl)
         
-    def __no_threshold(self: Self, candidates: list[tuple[T, Component]]) -> Component:
+    def __no_threshold(self: Self, candidates: CandidateList) -> Component:
+        if candidates.batched:
+            rcl = (candidates.scores == candidates.scores.max()).nonzero()[0]
+            return candidates.moves[rcl[self.rng.randrange(len(rcl))]]
         cmax = max(candidates, key=itemgetter(0))[0]
         rcl = [c for decr, c in candidates if decr == cmax]
-        return random.choice(rcl) 
\ No newline at end of file
+        return self.rng.choice(rcl)
+
+def _search(grasp: GRASP, solution: Solution, timer: Timer, rng: random.Random) -> tuple[Optional[Solution], int]:
+    random.seed(rng.getrandbits(64))
+    grasp.rng = rng
+    grasp.n_jobs = None
+    evaluations = timer.evaluations
+    return grasp(solution, timer), timer.evaluations - evaluations
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import logging
-
-from typing import cast, Protocol, TypeVar, Optional, Iterable, Mapping, TypedDict
+from typing import cast, Protocol, TypeVar, Optional, Iterable, Mapping, Sequence, Tuple, TypedDict, Callable, Any
 from typing_extensions import Self,Unpack
 
+import heapq
+
 from operator import itemgetter
 
+from ..utils import implemented, provided
+from ..observers import Observer, ITERATION
+
 Component = TypeVar('Component')
 
 class Comparable(Protocol): 
@@ -15,7 +18,16 @@ class Comparable(Protocol):
 T = TypeVar("T", bound=Comparable, covariant=True)
  
 class GreedyConstruction:  
+    def __init__(self: Self, lazy: Optional[bool] = None, observer: Optional[Observer] = None) -> None:
+        self.lazy = lazy
+        self.observer = observer
+
     def __call__(self: Self, solution: Solution) -> Solution: 
+        if _lazy(self.lazy, solution):
+            return _lazy_greedy(solution, lambda c: None if (u := solution.upper_bound_increment_add(c)) is None
+                                    else (-u, -solution.objective_increment_add(c)), self.observer)
+        if implemented(getattr(solution, "upper_bound_increments_add", None)):
+            return self.__batched(solution)
         while (c := max(filter(lambda v: v[0] is not None,
                         map(lambda c:((
                                 solution.upper_bound_increment_add(c),
@@ -25,49 +37,157 @@ class GreedyConstruction:
                     default = None,
                     key = itemgetter(0))) is not None:
             solution.add(c[1]) 
-            logging.info(f"SCORE: {solution.score()}")
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
+        return solution
+
+    def __batched(self: Self, solution: Solution) -> Solution:
+        while len((batch := _scored(solution.upper_bound_increments_add()))[0]):
+            moves, incrs = batch
+            ties = (incrs == incrs.max()).nonzero()[0]
+            solution.add(max((moves[i] for i in ties), key=solution.objective_increment_add))
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
         return solution
                 
     class SolutionProtocol(Protocol[T, Component]):
+        def objective(self: Self) -> Optional[T]: ...
         def add(self: Self, component: Component) -> None: ...
         def add_moves(self: Self) -> Iterable[Component]: ...  
         def objective_increment_add(self: Self, component: Component) -> Optional[T]: ... 
         def upper_bound_increment_add(self: Self, component: Component) -> Optional[T]: ...
+        # Optional, all add moves and their increments as (moves, array)
+        def upper_bound_increments_add(self: Self) -> Tuple[Sequence[Component], Any]: ...
         
     Solution = TypeVar('Solution', bound=SolutionProtocol)
 
 class GreedyUpperBoundConstruction: 
+    def __init__(self: Self, lazy: Optional[bool] = None, observer: Optional[Observer] = None) -> None:
+        self.lazy = lazy
+        self.observer = observer
+
     def __call__(self: Self, solution: Solution) -> Solution: 
+        if _lazy(self.lazy, solution):
+            return _lazy_greedy(solution, lambda c: None if (u := solution.upper_bound_increment_add(c)) is None else -u, self.observer)
+        if implemented(getattr(solution, "upper_bound_increments_add", None)):
+            return self.__batched(solution)
         while (c := max(filter(lambda v: v[0] is not None,
                         map(lambda c: (solution.upper_bound_increment_add(c), c),
                             solution.add_moves())),
                     default = None,
                     key = itemgetter(0))) is not None:
             solution.add(c[1]) 
-            logging.debug(f"SCORE: {solution.score()}")
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
+        return solution
+
+    def __batched(self: Self, solution: Solution) -> Solution:
+        while len((batch := _scored(solution.upper_bound_increments_add()))[0]):
+            moves, incrs = batch
+            solution.add(moves[int(incrs.argmax())])
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
         return solution
                     
     class SolutionProtocol(Protocol[T, Component]):
+        def objective(self: Self) -> Optional[T]: ...
         def add(self: Self, component: Component) -> None: ...
         def add_moves(self: Self) -> Iterable[Component]: ...  
         def upper_bound_increment_add(self: Self, component: Component) -> Optional[T]: ...
+        def upper_bound_increments_add(self: Self) -> Tuple[Sequence[Component], Any]: ...
         
     Solution = TypeVar('Solution', bound=SolutionProtocol)
          
 class GreedyObjectiveConstruction:  
+    def __init__(self: Self, lazy: Optional[bool] = None, observer: Optional[Observer] = None) -> None:
+        self.lazy = lazy
+        self.observer = observer
+
     def __call__(self: Self, solution: Solution) -> Solution:
+        if _lazy(self.lazy, solution):
+            return _lazy_greedy(solution, lambda c: None if (o := solution.objective_increment_add(c)) is None else -o, self.observer)
+        if implemented(getattr(solution, "objective_increments_add", None)):
+            return self.__batched(solution)
         while (c := max(filter(lambda v: v[0] is not None,
                         map(lambda c: (solution.objective_increment_add(c), c),
                             solution.add_moves())),
                     default = None,
                     key = itemgetter(0))) is not None:
             solution.add(c[1])
-            logging.debug(f"SCORE: {solution.score()}")
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
+        return solution
+
+    def __batched(self: Self, solution: Solution) -> Solution:
+        while len((batch := _scored(solution.objective_increments_add()))[0]):
+            moves, incrs = batch
+            solution.add(moves[int(incrs.argmax())])
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
         return solution
                 
     class SolutionProtocol(Protocol[T, Component]):
+        def objective(self: Self) -> Optional[T]: ...
         def add(self: Self, component: Component) -> None: ...
         def add_moves(self: Self) -> Iterable[Component]: ...  
         def objective_increment_add(self: Self, component: Component) -> Optional[T]: ...
+        def objective_increments_add(self: Self) -> Tuple[Sequence[Component], Any]: ...
         
-    Solution = TypeVar('Solution', bound=SolutionProtocol) 
\ No newline at end of file
+    Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+# Drops the moves a batch leaves unscored, None in an object array or NaN,
+# which the full scans skip when the single-move method returns None
+def _scored(batch: Tuple[Sequence[Any], Any]) -> Tuple[Sequence[Any], Any]:
+    moves, scores = batch
+    keep = scores != None if scores.dtype == object else scores == scores
+    if keep.all():
+        return batch
+    keep = keep.nonzero()[0]
+    return [moves[i] for i in keep.tolist()], scores[keep].astype(float)
+
+def _lazy(lazy: Optional[bool], solution: Any) -> bool:
+    if lazy is None:
+        return provided(solution, "submodular") and solution.submodular()
+    return lazy
+
+# CELF-style lazy greedy. Candidates are kept in a heap under the score they
+# had when last evaluated, and only the top one is re-evaluated until it stays
+# on top with a score from the current step. This picks the same moves as a
+# full scan when no increment can grow as components are added, which
+# solutions declare with submodular(). key returns the negated score, or None
+# for moves that are discarded. Like the candidate lists, the moves still in
+# play are tracked by component id.
+def _lazy_greedy(solution: Any, key: Callable[[Any], Any], observer: Optional[Observer]) -> Any:
+    heap = [(k, i, 0, c) for i, c in enumerate(solution.add_moves()) if (k := key(c)) is not None]
+    heapq.heapify(heap)
+    valid = {c.id() for _, _, _, c in heap}
+    incremental = provided(solution, "invalidated_add_moves")
+    n, step = len(heap), 0
+    while len(heap):
+        _, i, stamp, c = heap[0]
+        if c.id() not in valid:
+            heapq.heappop(heap)
+        elif stamp != step:
+            if (k := key(c)) is None:
+                heapq.heappop(heap)
+                valid.discard(c.id())
+            else:
+                heapq.heapreplace(heap, (k, i, step, c))
+        else:
+            heapq.heappop(heap)
+            solution.add(c)
+            step += 1
+            if observer is not None:
+                observer(ITERATION, objective=solution.objective())
+            if incremental and (invalidated := solution.invalidated_add_moves()) is not None:
+                removed, changed = invalidated
+                valid.difference_update(c.id() for c in removed)
+            else:
+                changed = list(solution.add_moves())
+                valid &= {c.id() for c in changed}
+            for c in changed:
+                if c.id() not in valid and (k := key(c)) is not None:
+                    heapq.heappush(heap, (k, n, step, c))
+                    valid.add(c.id())
+                    n += 1
+    return solution
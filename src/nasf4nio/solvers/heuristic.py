@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import random
-import logging
 
-from typing import TypeVar, Protocol, Optional, Iterable, TypedDict, cast
+from typing import TypeVar, Protocol, Optional, Iterable, TypedDict, Any, cast
 from typing_extensions import Self, Unpack
 
 from itertools import islice
 from operator import itemgetter
 
+from .candidates import CandidateList
+from .elite import ElitePool
+from ..utils import Incumbent, LRUCache, cached_search, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
+
 Component = TypeVar("Component")
 
 class Comparable(Protocol): 
@@ -18,16 +22,24 @@ T = TypeVar("T", bound=Comparable, covariant=True)
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol)
 
 class HeuristicConstruction: 
+    def __init__(self: Self, observer: Optional[Observer] = None) -> None:
+        self.observer = observer
+
     def __call__(self: Self, solution: Solution) -> Solution:
         while (c := solution.heuristic_add_move()) is not None:
             solution.add(c)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
         return solution
 
     class SolutionProtocol(Protocol[Component]):
+        def objective(self: Self) -> Any: ...
         def heuristic_add_move(self: Self) -> Optional[Component]: ...
         def add(self: Self, component: Component) -> None: ...  
         
@@ -35,8 +47,9 @@ class HeuristicConstruction:
     
     
 class NarrowGuidedHeuristicConstruction:   
-    def __init__(self: Self, limit: int = 10) -> None:
+    def __init__(self: Self, limit: int = 10, observer: Optional[Observer] = None) -> None:
         self.limit = limit
+        self.observer = observer
         
     def __call__(self: Self, solution: Solution) -> Solution: 
         while (c := max(filter(lambda v: v[0] is not None,
@@ -45,9 +58,12 @@ class NarrowGuidedHeuristicConstruction:
                     default = None,
                     key = itemgetter(0))) is not None:
             solution.add(c[1])
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
         return solution
                 
     class SolutionProtocol(Protocol[T, Component]):
+        def objective(self: Self) -> Optional[T]: ...
         def add(self: Self, component: Component) -> None: ...
         def heuristic_add_moves(self: Self) -> Iterable[Component]: ...  
         def upper_bound_increment_add(self: Self, component: Component) -> Optional[T]: ...
@@ -58,39 +74,74 @@ class HGRASP:
     def __init__(self: Self, alpha: Optional[float] = 0.1,
                  seed: Optional[int] = None,
                  local_search: Optional[LocalSearch] = None, 
+                 elite: Optional[int] = None,
+                 diversity: int = 1,
+                 cache: Optional[int] = None,
+                 observer: Optional[Observer] = None,
                  **kwargs: Unpack[TypedDict]) -> None:
         self.alpha = alpha
         self.seed = seed
         self.local_search = local_search
+        self.elite = elite
+        self.diversity = diversity
+        self.cache = cache
+        self.results: Optional[LRUCache] = None
+        self.observer = observer
         self.kwargs = kwargs
+        self.rng = random.Random(seed)
          
     def __call__(self: Self, solution: Solution, timer: Timer) -> Optional[Solution]:
+        timer = tracked(timer)
+        self.results = None if self.cache is None else LRUCache(self.cache)
         best, bobjv = None, None
+        pool = None if self.elite is None else ElitePool(self.elite, self.diversity)
+        improve = None if self.local_search is None else self.__improve
         while not timer.finished():
             s = solution.copy()
-            b, bobj = (s.copy(), s.objective()) if s.feasible() else (None, None)
-            candidates = [(cast(T, s.heuristic_value(c)), c) for c in s.add_moves()]
+            b, bobj = (Incumbent(s), s.objective()) if s.feasible() else (None, None)
+            candidates = CandidateList(s, s.heuristic_value, getattr(s, "heuristic_values", None))
             while len(candidates) != 0:
-                cmin = min(candidates, key=itemgetter(0))[0]
-                cmax = max(candidates, key=itemgetter(0))[0]
-                thresh = cmin + self.alpha * (cmax - cmin)
-                rcl = [c for decr, c in candidates if decr <= thresh]
-                c = random.choice(rcl)
+                if candidates.batched:
+                    scores = candidates.scores
+                    cmin, cmax = scores.min(), scores.max()
+                    rcl = (scores <= cmin + self.alpha * (cmax - cmin)).nonzero()[0]
+                    c = candidates.moves[rcl[self.rng.randrange(len(rcl))]]
+                else:
+                    cmin = min(candidates, key=itemgetter(0))[0]
+                    cmax = max(candidates, key=itemgetter(0))[0]
+                    thresh = cmin + self.alpha * (cmax - cmin)
+                    rcl = [c for decr, c in candidates if decr <= thresh]
+                    c = self.rng.choice(rcl)
                 s.add(c)
                 if s.feasible():
                     obj = cast(T, s.objective())
                     if bobj is None or obj > bobj:
-                        b, bobj = s.copy(), obj
-                candidates = [(cast(T, s.heuristic_value(c)), c) for c in s.add_moves()]
+                        if b is None:
+                            b = Incumbent(s)
+                        else:
+                            b.save()
+                        bobj = obj
+                candidates.update()
+            timer.evaluated(candidates.evaluations)
             if b is not None:
+                b = b.result()
                 if self.local_search is not None:
-                    b: HGRASP.Solution = self.local_search(b, **self.kwargs)
+                    b: HGRASP.Solution = cached_search(self.results, self.local_search, b, **self.kwargs)
                     if b is not None and b.feasible():
                         bobj = cast(T, b.objective())
+                if pool is not None and b is not None and b.feasible():
+                    b, bobj = pool.relink_and_add(b, bobj, timer, self.rng, improve)
                 if bobjv is None or bobj > bobjv:
                     best, bobjv = b, bobj     
-                    logging.debug("SCORE: ", solution.score())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=bobjv)
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=bobjv)
         return best
+
+    def __improve(self: Self, solution: HGRASP.Solution) -> Optional[HGRASP.Solution]:
+        return cached_search(self.results, self.local_search, solution, **self.kwargs)
      
     class SolutionProtocol(Protocol[T, Component]):
         def copy(self: Self) -> Self: ...
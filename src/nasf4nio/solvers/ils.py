@@ -1,14 +1,26 @@
 from __future__ import annotations
 
-from typing import cast, Union, TypeVar, Optional, Protocol, Iterable, Any
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from typing import cast, Union, TypeVar, Optional, Protocol, Iterable, Sequence, Tuple, Any
 from typing_extensions import Self
 
+from ..utils import Termination, Incumbent, spawn, tracked
+from ..observers import Observer, INCUMBENT, ITERATION, RESTART
+
 LocalMove = TypeVar('LocalMove')
 
 T = TypeVar("T", bound=Any) 
     
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
+    def elapsed(self: Self) -> float: ...
+    def budget(self: Self) -> float: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol) 
     
@@ -23,37 +35,124 @@ class SolutionProtocol(Protocol[T, LocalMove]):
 Solution = TypeVar('Solution', bound=SolutionProtocol)
 
 class ILS:
-    def __init__(self: Self, ks: Optional[int] = 3, zero: Any = 0) -> None:
+    def __init__(self: Self, ks: Optional[int] = 3, zero: Any = 0,
+                 observer: Optional[Observer] = None) -> None:
         self.ks = ks 
         self.zero = zero
+        self.observer = observer
   
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
-        best = solution.copy()
-        bobjv = cast(T, best.objective())
+        timer = tracked(timer)
+        best = Incumbent(solution)
+        bobjv = cast(T, solution.objective())
         while not timer.finished():
             for move in solution.random_local_moves_wor():
                 incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
                 if incr > self.zero:
                     solution.step(move)
-                    print(solution.score())
                     break
                 if timer.finished():
                     obj = cast(T, solution.objective())
                     if obj > bobjv:
                         return solution
                     else:
-                        return best
+                        return best.result()
             else:
                 obj = cast(T, solution.objective())
                 if obj >= bobjv:
-                    best = solution.copy()
+                    best.save()
                     bobjv = obj
-                    print(best.score())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=bobjv)
                 else:
-                    solution = best.copy()
+                    solution = best.restore()
+                    if self.observer is not None:
+                        self.observer(RESTART, objective=bobjv)
                 solution.perturb(self.ks)
+                timer.iterated(bobjv)
+                if self.observer is not None:
+                    self.observer(ITERATION, objective=bobjv)
         obj = cast(T, solution.objective())
         if obj > bobjv:
             return solution
         else:
-            return best
+            return best.result()
+
+# Each island runs ILS for interval seconds, after which the
+# best solution of every island migrates to the next one in a ring and is
+# adopted there if it is better. Every island draws its moves and
+# perturbations from its own generator, spawned from seed, in both modes.
+class IslandILS:
+    def __init__(self: Self, islands: int = 4,
+                 ks: Union[int, Sequence[int]] = 3,
+                 interval: float = 0.1,
+                 zero: Any = 0,
+                 seed: Optional[int] = None,
+                 n_jobs: Optional[int] = None,
+                 observer: Optional[Observer] = None) -> None:
+        self.ks = [ks] * islands if isinstance(ks, int) else list(ks)
+        self.islands = len(self.ks)
+        self.interval = interval
+        self.zero = zero
+        self.n_jobs = n_jobs
+        self.observer = observer
+        self.rng = random.Random(seed)
+
+    def __getstate__(self: Self) -> dict:
+        state = self.__dict__.copy()
+        state["observer"] = None
+        return state
+
+    def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        islands = [solution.copy() for _ in range(self.islands)]
+        searches = [ILS(ks, self.zero) for ks in self.ks]
+        best = solution.copy()
+        bobjv = cast(T, best.objective())
+        parallel = self.n_jobs is not None and self.n_jobs > 1
+        with ProcessPoolExecutor(max_workers=self.n_jobs) if parallel else nullcontext() as pool:
+            while not timer.finished():
+                n = self.islands
+                args = (searches, islands, [self.interval] * n, [timer] * n, spawn(self.rng, n))
+                results, improved = [], False
+                for s, obj, evaluations in map(_island, *args) if pool is None else pool.map(_island, *args):
+                    timer.evaluated(evaluations)
+                    results.append((s, obj))
+                    if obj > bobjv:
+                        best, bobjv, improved = s.copy(), obj, True
+                if improved and self.observer is not None:
+                    self.observer(INCUMBENT, objective=bobjv)
+                migrations = 0
+                for i in range(n):
+                    migrant, obj = results[i - 1]
+                    if obj > results[i][1]:
+                        islands[i] = migrant.copy()
+                        migrations += 1
+                    else:
+                        islands[i] = results[i][0]
+                timer.iterated(bobjv)
+                if self.observer is not None:
+                    self.observer(ITERATION, objective=bobjv, migrations=migrations)
+        return best.copy()
+
+# The problems draw from the random module, so it is seeded from the island
+# generator for the run and then restored. Islands stop after interval
+# seconds, and under a Termination also within what is left of its limits;
+# run serially, each island sees the evaluations of the ones before it.
+def _island(ils: ILS, solution: Solution, interval: float, timer: Timer,
+            rng: random.Random) -> Tuple[Solution, T, int]:
+    state = random.getstate()
+    random.seed(rng.getrandbits(64))
+    epoch = _epoch(timer, min(interval, timer.budget() - timer.elapsed()))
+    solution = ils(solution, epoch)
+    random.setstate(state)
+    return solution, cast(T, solution.objective()), epoch.evaluations
+
+def _epoch(timer: Timer, budget: float) -> Termination:
+    if not isinstance(timer, Termination):
+        return Termination(budget)
+    return Termination(budget, evaluations=timer.max_evaluations - timer.evaluations,
+                       iterations=timer.max_iterations - timer.iterations,
+                       target=timer.target, stall=timer.stall - timer.stalled,
+                       stride=timer.stride, adaptive=timer.adaptive, resolution=timer.resolution)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-import logging
 import random
 
-from typing import TypeVar, Protocol, Optional, Iterable, TypedDict, cast
+from typing import TypeVar, Protocol, Optional, Iterable, TypedDict, Any, cast
 from typing_extensions import Self, Unpack
 
 from operator import itemgetter 
 
+from .candidates import CandidateList
+from ..utils import Incumbent, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
+
 Component = TypeVar("Component")
 
 class Comparable(Protocol): 
@@ -17,6 +20,8 @@ T = TypeVar("T", bound=Comparable, covariant=True)
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol)
 
@@ -35,49 +40,66 @@ Solution = TypeVar('Solution', bound=SolutionProtocol)
 
 class IteratedGreedy:
     def __init__(self: Self, alpha: Optional[float] = 0.9,
-                 ks: Optional[int] = 2) -> None:
+                 ks: Optional[int] = 2,
+                 seed: Optional[int] = None,
+                 observer: Optional[Observer] = None) -> None:
         self.alpha = alpha  
         self.ks = ks
+        self.observer = observer
+        self.rng = random.Random(seed)
  
         self.__filter = self.__threshold if alpha else self.__no_threshold
   
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution: 
-        best, bobjv = (solution.copy(), solution.objective()) if solution.feasible() else (None, None)
+        timer = tracked(timer)
+        best, bobjv = (Incumbent(solution), solution.objective()) if solution.feasible() else (None, None)
         while not timer.finished():
-            candidates = [(solution.upper_bound_increment_add(c), c) for c in solution.add_moves()]
+            candidates = CandidateList(solution, solution.upper_bound_increment_add,
+                                       getattr(solution, "upper_bound_increments_add", None))
             while len(candidates) != 0:
                 c = self.__filter(candidates)
                 solution.add(c)
                 if bobjv is not None and cast(T, solution.objective()) < bobjv:
                     break
-                candidates = [(solution.upper_bound_increment_add(c), c) for c in solution.add_moves()] 
+                candidates.update()
+            timer.evaluated(candidates.evaluations)
 
-            # logging.debug(f"SCORE: {solution.score()}")
             if solution.feasible():
                 obj = cast(T, solution.objective())
                 if bobjv is None or obj > bobjv: 
-                    best, bobjv = solution.copy(), obj
-                    logging.debug(f"BEST SCORE: {solution.score()}")
+                    if best is None:
+                        best = Incumbent(solution)
+                    else:
+                        best.save()
+                    bobjv = obj
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=bobjv)
 
             for _ in range(self.ks):
                 c = solution.random_remove_move()
                 if c is not None:
-                    print(c)
-                    print(solution.gc, solution.ub_kp, solution.ub_full, solution.ub_frac, solution.ub_lim)
-                    incr = solution.upper_bound_increment_remove(c)
-                    ub = solution.upper_bound()
                     solution.remove(c)    
-                    assert solution.upper_bound() == ub + incr, f"{ub} {incr} {solution.upper_bound()}"
-        return best
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=bobjv)
+        return None if best is None else best.result()
      
-    def __threshold(self: Self, candidates: list[tuple[T, Component]]) -> Component: 
+    def __threshold(self: Self, candidates: CandidateList) -> Component: 
+        if candidates.batched:
+            scores = candidates.scores
+            cmin, cmax = scores.min(), scores.max()
+            rcl = (scores <= cmin + self.alpha * (cmax - cmin)).nonzero()[0]
+            return candidates.moves[rcl[self.rng.randrange(len(rcl))]]
         cmin = min(candidates, key=itemgetter(0))[0]
         cmax = max(candidates, key=itemgetter(0))[0]
         thresh = cmin + self.alpha * (cmax - cmin)
         rcl = [c for decr, c in candidates if decr <= thresh]
-        return random.choice(rcl)
+        return self.rng.choice(rcl)
         
-    def __no_threshold(self: Self, candidates: list[tuple[T, Component]]) -> Component:
+    def __no_threshold(self: Self, candidates: CandidateList) -> Component:
+        if candidates.batched:
+            rcl = (candidates.scores == candidates.scores.max()).nonzero()[0]
+            return candidates.moves[rcl[self.rng.randrange(len(rcl))]]
         cmax = max(candidates, key=itemgetter(0))[0]
         rcl = [c for decr, c in candidates if decr == cmax]
-        return random.choice(rcl) 
\ No newline at end of file
+        return self.rng.choice(rcl) 
\ No newline at end of file
@@ -3,15 +3,21 @@ from __future__ import annotations
 import math
 import random
 
-from typing import cast, TypeVar, Protocol, Optional, Union, Iterable, Hashable, TypedDict, List
-from typing_extensions import Self, Unpack
+from concurrent.futures import ProcessPoolExecutor, Executor
+from contextlib import nullcontext
 
-from collections import defaultdict
+from typing import cast, TypeVar, Protocol, Optional, Union, Iterable, Hashable, TypedDict, List, Tuple, Mapping, Callable, Any
+from typing_extensions import Self, Unpack
 
-from ..utils import argmax, isclose
+from ..utils import FenwickSampler, LRUCache, cached_search, argmax, isclose, provided, spawn, tracked
+from .pheromones import Pheromones
+from ..observers import Observer, INCUMBENT, ITERATION, PHEROMONE_RESET
 
 class TimerProtocol(Protocol):
+    evaluations: int
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol)
 
@@ -47,6 +53,10 @@ class MMAS:
                  global_ratio: float = 0.5, n_restart: int = 500,
                  seed: Optional[int] = None,
                  local_search: Optional[LocalSearch[Solution]] = None,
+                 n_components: Optional[int] = None,
+                 n_jobs: Optional[int] = None,
+                 cache: Optional[int] = None,
+                 observer: Optional[Observer] = None,
                  **kwargs: Unpack[TypedDict]) -> None:
         self.tau_max = tau_max
         self.a = a
@@ -56,104 +66,237 @@ class MMAS:
         self.global_ratio = global_ratio
         self.n_restart = n_restart
         self.local_search = local_search
+        self.n_components = n_components
+        self.n_jobs = n_jobs
+        self.cache = cache
+        self.results: Optional[LRUCache] = None
+        self.observer = observer
         self.kwargs = kwargs
-        
-        if seed is not None:
-            random.seed(seed)
+        self.rng = random.Random(seed)
+
+    def __getstate__(self: Self) -> dict:
+        state = self.__dict__.copy()
+        state["observer"] = None
+        state["results"] = None
+        return state
 
     def __call__(self: Self, population: Population, timer: Timer) -> Optional[Solution]:
-        tau_min = self.tau_max / self.a
-        tau0 = self.tau_max
-        tau: dict[Hashable, float] = defaultdict(lambda: tau0)
+        timer = tracked(timer)
+        self.results = None if self.cache is None else LRUCache(self.cache)
+        tau = Pheromones(self.tau_max, self.tau_max / self.a, self.tau_max, size=self.n_components)
 
         best, bobjv = None, None
         ni = 0
-        while not timer.finished():
-            ni += 1
-            
-            # Build ants
-            ants = []
-            for s in population:
-                if timer.finished():
-                    break
-                ant: Solution = self.ant(cast(Solution, s).copy(), tau)
-
-                if ant.feasible() and (bobjv is None or ant.objective() > bobjv):
-                    best = ant.copy()
-                    bobjv = cast(T, ant.objective())
-                    ni = 0
-
-                if self.local_search is not None:
-                    ant = self.local_search(ant, **self.kwargs)
-                    if ant.feasible() and (bobjv is None or cast(T, ant.objective()) > bobjv):
-                        best = ant.copy()
-                        bobjv = cast(T, ant.objective())
+        parallel = self.n_jobs is not None and self.n_jobs > 1
+        with ProcessPoolExecutor(max_workers=self.n_jobs) if parallel else nullcontext() as pool:
+            while not timer.finished():
+                ni += 1
+
+                # Build ants
+                ants = []
+                for constructed, ant in self.__build(population, tau, bobjv, timer, pool):
+                    if constructed is not None and (bobjv is None or cast(T, constructed.objective()) > bobjv):
+                        best = constructed
+                        bobjv = cast(T, constructed.objective())
                         ni = 0
 
-                if ant.feasible():
-                    ants.append(ant)
-
-            # Update pheromones
-            if ni < self.n_restart:
-                tau_max = 1 - 1.0 / cast(T, bobjv)
-                tau_min = tau_max / self.a
-                tau0 = (1.0 - self.rho) * tau0
-                tau0 = max(tau_min, min(tau_max, tau0))
-                
-                for k in tau:
-                    tau[k] = max(tau_min, min(tau_max, (1.0 - self.rho) * tau[k]))
+                    if self.local_search is not None:
+                        if ant.feasible() and (bobjv is None or cast(T, ant.objective()) > bobjv):
+                            best = ant
+                            bobjv = cast(T, ant.objective())
+                            ni = 0
+
+                    if ant.feasible():
+                        ants.append(ant)
+
+                if ni == 0 and self.observer is not None:
+                    self.observer(INCUMBENT, objective=bobjv)
+
+                # Update pheromones
+                if ni < self.n_restart:
+                    tau_max = 1 - 1.0 / cast(T, bobjv)
+                    tau.bound(tau_max / self.a, tau_max)
+                    tau.evaporate(self.rho)
                     
-                if (best is None and len(ants) > 0) or (len(ants) > 0 and random.random() > self.global_ratio):
-                    # Using iteration-best ant
-                    bi = argmax(map(lambda ant: cast(T, cast(Solution, ant).objective()), ants))
-                    b: Solution = ants[bi]
-                    obj = cast(T, b.objective())
-                    for c in b.components():
-                        cid = cast(Component, c).id()
-                        if cid not in tau:
-                            tau[cid] = min(tau_max, tau0 + (1 - 1.0 / obj))
-                        else:
-                            tau[cid] = min(tau_max, tau[cid] + (1 - 1.0 / obj))
-                elif best is not None:
-                    # Using global-best ant
-                    for c in best.components():
-                        cid = cast(Component, c).id()
-                        if cid not in tau:
-                            tau[cid] = min(tau_max, tau0 + (1 - 1.0 / cast(T, bobjv)))
-                        else:
-                            tau[cid] = min(tau_max, tau[cid] + (1 - 1.0 / cast(T, bobjv)))
-            else:
-                # Reinitialization
-                tau_max = 1 - 1.0 / cast(T, bobjv)
-                tau_min = tau_max / self.a
-                tau0 = tau_max
-                for k in tau:
-                    tau[k] = tau0
+                    if (best is None and len(ants) > 0) or (len(ants) > 0 and self.rng.random() > self.global_ratio):
+                        # Using iteration-best ant
+                        bi = argmax(map(lambda ant: cast(T, cast(Solution, ant).objective()), ants))
+                        b: Solution = ants[bi]
+                        obj = cast(T, b.objective())
+                        tau.deposit((cast(Component, c).id() for c in b.components()), 1 - 1.0 / obj)
+                    elif best is not None:
+                        # Using global-best ant
+                        tau.deposit((cast(Component, c).id() for c in best.components()), 1 - 1.0 / cast(T, bobjv))
+                else:
+                    # Reinitialization
+                    tau_max = 1 - 1.0 / cast(T, bobjv)
+                    tau.reset(tau_max, tau_max / self.a, tau_max)
+                    if self.observer is not None:
+                        self.observer(PHEROMONE_RESET, tau_max=tau_max, objective=bobjv)
+                timer.iterated(bobjv)
+                if self.observer is not None:
+                    self.observer(ITERATION, objective=bobjv)
         return best
     
-    def ant(self: Self, solution: Solution, tau: dict[T, float]) -> Solution:
+    def ants(self: Self, population: Population, tau: Mapping[Hashable, float],
+             bobjv: Optional[T], timer: Timer) -> List[Tuple[Optional[Solution], Solution]]:
+        timer = tracked(timer)
+        ants, factors = [], {}
+        for s in population:
+            if timer.finished():
+                break
+            ant: Solution = self.ant(cast(Solution, s).copy(), tau, timer, factors)
+
+            constructed = None
+            if ant.feasible() and (bobjv is None or cast(T, ant.objective()) > bobjv):
+                constructed = ant if self.local_search is None else ant.copy()
+                bobjv = cast(T, ant.objective())
+
+            if self.local_search is not None:
+                ant = cached_search(self.results, self.local_search, ant, **self.kwargs)
+
+            ants.append((constructed, ant))
+        return ants
+
+    def __build(self: Self, population: Population, tau: Pheromones, bobjv: Optional[T],
+                timer: Timer, pool: Optional[Executor]) -> List[Tuple[Optional[Solution], Solution]]:
+        if pool is None:
+            return self.ants(population, tau, bobjv, timer)
+        n = -(-len(population) // self.n_jobs)
+        chunks = [population[i:i + n] for i in range(0, len(population), n)]
+        futures = [pool.submit(_ants, self, chunk, tau, bobjv, timer, rng)
+                   for chunk, rng in zip(chunks, spawn(self.rng, len(chunks)))]
+        ants = []
+        for f in futures:
+            a, evaluations = f.result()
+            ants.extend(a)
+            timer.evaluated(evaluations)
+        return ants
+
+    # Components are drawn with probability proportional to
+    # tau[k]**alpha * (1 / -incr)**beta, where incr is the upper bound
+    # increment, and uniformly among those that leave the upper bound as is
+    # whenever there are any. tau does not change while the ants of an
+    # iteration are built, so tau[k]**alpha is kept in factors. When the
+    # solution reports the add moves invalidated by each addition, only those
+    # are evaluated again and the weights are kept in a Fenwick tree, which
+    # makes every draw O(log n) instead of a scan over all the add moves. Like
+    # the candidate lists, the moves are tracked by component id.
+    def ant(self: Self, solution: Solution, tau: Mapping[Hashable, float],
+            timer: Optional[Timer] = None, factors: Optional[dict] = None) -> Solution:
+        factors = {} if factors is None else factors
+        timer = None if timer is None else tracked(timer)
+
+        def weight(c: Component) -> Optional[float]:
+            incr = solution.upper_bound_increment_add(c)
+            if incr is None:
+                raise ValueError("Upper Bound Increment cannot be NoneType")
+            if isclose(incr, 0.0):
+                return None
+            k = cast(Component, c).id()
+            if (f := factors.get(k)) is None:
+                f = factors[k] = tau[k]**self.alpha
+            return f * ((1.0 / -incr) ** self.beta)
+
+        if not provided(solution, "invalidated_add_moves"):
+            return self.__scan(solution, weight, timer)
+
+        moves: Optional[Iterable[Component]] = None
+        while True:
+            if moves is None:
+                sampler, owner, slots = FenwickSampler(), [], {}
+                active, zero, where = {}, [], {}
+                moves = solution.add_moves()
+            n = 0
+            for c in moves:
+                n += 1
+                k = cast(Component, c).id()
+                if (w := weight(c)) is None:
+                    if k in active:
+                        sampler.update(active.pop(k), 0.0)
+                    if k not in where:
+                        where[k] = len(zero)
+                        zero.append(c)
+                    continue
+                if k in where:
+                    self.__discard(zero, where, k)
+                if (slot := slots.get(k)) is None:
+                    slot = slots[k] = sampler.append(w)
+                    owner.append(c)
+                else:
+                    sampler.update(slot, w)
+                    owner[slot] = c
+                active[k] = slot
+            if timer is not None:
+                timer.evaluated(n)
+            if len(zero) > 0:
+                best = self.rng.choice(zero)
+            elif len(active) > 0:
+                if sampler.total() > 0:
+                    best = owner[sampler.sample(self.rng)]
+                else:
+                    best = owner[self.rng.choice(list(active.values()))]
+            else:
+                break
+            solution.add(best)
+            if (invalidated := solution.invalidated_add_moves()) is None:
+                moves = None
+                continue
+            removed, moves = invalidated
+            for c in removed:
+                k = cast(Component, c).id()
+                if k in active:
+                    sampler.update(active.pop(k), 0.0)
+                if k in where:
+                    self.__discard(zero, where, k)
+        return solution
+
+    def __scan(self: Self, solution: Solution, weight: Callable[[Component], Optional[float]],
+               timer: Optional[Timer]) -> Solution:
         while True:
             cs, cszero, p = [], [], []
-            best = None
             for c in solution.add_moves():
-                k = cast(Component, c).id()
-                incr = solution.upper_bound_increment_add(c)
-                if incr is None:
-                    raise ValueError("Upper Bound Increment cannot be NoneType")
-                if isclose(incr, 0.0):
+                if (w := weight(c)) is None:
                     cszero.append(c)
                 else:
                     cs.append(c)
-                    p.append((tau[k]**self.alpha) * ((1.0 / -incr) ** self.beta))
-            if best is None:
-                if len(cszero) > 0:
-                    best = random.choice(cszero)
-                elif len(cs) > 0:
-                    if sum(p) > 0:
-                        best = random.choices(cs, p, k = 1)[0]
-                    else:
-                        best = random.choice(cs)
+                    p.append(w)
+            if timer is not None:
+                timer.evaluated(len(cs) + len(cszero))
+            if len(cszero) > 0:
+                best = self.rng.choice(cszero)
+            elif len(cs) > 0:
+                if sum(p) > 0:
+                    best = self.rng.choices(cs, p, k = 1)[0]
                 else:
-                    break
+                    best = self.rng.choice(cs)
+            else:
+                break
             solution.add(best)
         return solution
+
+    @staticmethod
+    def __discard(zero: List[Component], where: dict, k: Hashable) -> None:
+        i = where.pop(k)
+        last = zero.pop()
+        if i < len(zero):
+            zero[i] = last
+            where[cast(Component, last).id()] = i
+
+# The local search cache of a worker process. Workers live as long as the
+# pool of a single MMAS run, so it is shared by all the batches of ants the
+# worker builds in that run, but not with the other workers or the parent,
+# whose results stay empty.
+_results: Optional[LRUCache] = None
+
+def _ants(mmas: MMAS, population: Population, tau: Pheromones, bobjv: Optional[T],
+          timer: Timer, rng: random.Random) -> Tuple[List[Tuple[Optional[Solution], Solution]], int]:
+    global _results
+    random.seed(rng.getrandbits(64))
+    mmas.rng = rng
+    if mmas.cache is not None:
+        if _results is None:
+            _results = LRUCache(mmas.cache)
+        mmas.results = _results
+    evaluations = timer.evaluations
+    return mmas.ants(population, tau, bobjv, timer), timer.evaluations - evaluations
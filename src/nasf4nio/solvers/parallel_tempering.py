@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import math
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from typing import cast, Optional, Union, TypeVar, Protocol, Iterable, Sequence, Callable, Tuple, Any
+from typing_extensions import Self
+
+from ..utils import ExponentialAcceptance, spawn, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
+
+Number = Union[float, int]
+
+class TimerProtocol(Protocol):
+    def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
+
+Timer = TypeVar('Timer', bound=TimerProtocol)
+
+T = TypeVar('T', bound=Number, covariant=True)
+LocalMove = TypeVar('LocalMove')
+
+class SolutionProtocol(Protocol[T, LocalMove]):
+    def copy(self: Self) -> Self: ...
+    def objective(self: Self) -> T: ...
+    def step(self: Self, move: LocalMove) -> None: ...
+    def random_local_moves_wor(self: Self) -> Iterable[LocalMove]: ...
+    def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+AcceptanceCriteria = Optional[Callable[[float, float], float]]
+
+class ParallelTempering:
+    def __init__(self: Self, temperatures: Sequence[float],
+                 epoch: int = 1000,
+                 seed: Optional[int] = None,
+                 acceptance: Optional[AcceptanceCriteria] = None,
+                 n_jobs: Optional[int] = None,
+                 stride: int = 64,
+                 observer: Optional[Observer] = None) -> None:
+        self.temperatures = sorted(temperatures)
+        self.epoch = epoch
+        self.acceptance = ExponentialAcceptance() if acceptance is None else acceptance
+        self.n_jobs = n_jobs
+        self.stride = stride
+        self.observer = observer
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def geometric(cls: type[Self], tmin: float, tmax: float, m: int, **kwargs: Any) -> Self:
+        r = (tmax / tmin) ** (1 / (m - 1)) if m > 1 else 1.0
+        return cls([tmin * r ** i for i in range(m)], **kwargs)
+
+    def __getstate__(self: Self) -> dict:
+        state = self.__dict__.copy()
+        state["observer"] = None
+        return state
+
+    def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        m = len(self.temperatures)
+        replicas = [solution.copy() for _ in range(m)]
+        best = solution.copy()
+        bobjv = cast(T, best.objective())
+        objs = [bobjv] * m
+        parallel = self.n_jobs is not None and self.n_jobs > 1
+        with ProcessPoolExecutor(max_workers=self.n_jobs) if parallel else nullcontext() as pool:
+            odd, finished = 0, False
+            while not finished and not timer.finished():
+                args = (replicas, self.temperatures, [self.epoch] * m, [self.acceptance] * m,
+                        [bobjv] * m, spawn(self.rng, m), [parallel] * m, [timer] * m, [self.stride] * m)
+                improved = False
+                results = map(_anneal, *args) if pool is None else pool.map(_anneal, *args)
+                for i, (r, obj, b, bobj, evaluations, stopped) in enumerate(results):
+                    replicas[i], objs[i], finished = r, obj, finished or stopped
+                    if parallel:
+                        timer.evaluated(evaluations)
+                    if b is not None and bobj > bobjv:
+                        best, bobjv, improved = b, bobj, True
+                if improved and self.observer is not None:
+                    self.observer(INCUMBENT, objective=bobjv)
+
+                # Exchange the states of neighbouring temperatures
+                swaps = 0
+                for i in range(odd, m - 1, 2):
+                    ti, tj = self.temperatures[i], self.temperatures[i + 1]
+                    x = (objs[i + 1] - objs[i]) * (1 / ti - 1 / tj)
+                    if x >= 0 or math.exp(x) >= self.rng.random():
+                        replicas[i], replicas[i + 1] = replicas[i + 1], replicas[i]
+                        objs[i], objs[i + 1] = objs[i + 1], objs[i]
+                        swaps += 1
+                odd ^= 1
+                timer.iterated(bobjv)
+                if self.observer is not None:
+                    self.observer(ITERATION, objective=bobjv, swaps=swaps)
+        return best
+
+# Runs epoch Metropolis steps at a fixed temperature. The best state seen is
+# only copied (and sent back) if it beats the incumbent objective bobjv. The
+# evaluations are reported and the timer checked every stride steps; workers
+# get a copy of the timer, so their evaluations are also returned for the
+# caller to add up, along with whether the timer stopped the run.
+def _anneal(solution: Solution, temperature: float, epoch: int, acceptance: AcceptanceCriteria,
+            bobjv: T, rng: random.Random, reseed: bool, timer: Timer,
+            stride: int) -> Tuple[Solution, T, Optional[Solution], T, int, bool]:
+    if reseed:
+        random.seed(rng.getrandbits(64))
+    best, current, stopped = None, False, False
+    obj = cast(T, solution.objective())
+    moves = iter(solution.random_local_moves_wor())
+    evaluations = 0
+    for u in [rng.random() for _ in range(epoch)]:
+        if evaluations % stride == 0 and timer.finished():
+            stopped = True
+            break
+        if (move := next(moves, None)) is None:
+            moves = iter(solution.random_local_moves_wor())
+            if (move := next(moves, None)) is None:
+                break
+        delta = cast(T, solution.objective_increment_local(move))
+        evaluations += 1
+        if acceptance(delta, temperature) >= u:
+            if current and delta < 0:
+                best, current = solution.copy(), False
+            solution.step(move)
+            obj = cast(T, solution.objective())
+            if obj > bobjv:
+                bobjv, current = obj, True
+        if evaluations % stride == 0:
+            timer.evaluated(stride)
+    timer.evaluated(evaluations % stride)
+    if current:
+        best = solution.copy()
+    return solution, obj, best, bobjv, evaluations, stopped
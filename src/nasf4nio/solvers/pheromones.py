@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Optional, Hashable, Iterable, Dict
+from typing_extensions import Self
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Values are stored unscaled and multiplied by a global factor on read, so
+# evaporation only touches the factor. As long as the bounds do not decrease,
+# clamping on read gives the same values as clamping after every evaporation;
+# when they do, values are materialised around the next evaporation.
+class Pheromones:
+    def __init__(self: Self, tau0: float, tau_min: float, tau_max: float,
+                 size: Optional[int] = None, tolerance: float = 1e-100) -> None:
+        if size is not None and np is None:
+            raise ImportError("Dense pheromones require numpy")
+        self.size = size
+        self.tolerance = tolerance
+        self.reset(tau0, tau_min, tau_max)
+
+    def __len__(self: Self) -> int:
+        return len(self.values)
+
+    def __getitem__(self: Self, key: Hashable) -> float:
+        if self.size is None:
+            return self.__clamp(self.values.get(key, self.default) * self.scale)
+        return self.__clamp(float(self.values[key]) * self.scale)
+
+    def reset(self: Self, tau0: float, tau_min: float, tau_max: float) -> None:
+        self.tau_min, self.tau_max = tau_min, tau_max
+        self.scale = 1.0
+        self.stale = False
+        self.default = tau0
+        if self.size is None:
+            self.values: Dict[Hashable, float] = {}
+        else:
+            self.values = np.full(self.size, tau0)
+
+    def bound(self: Self, tau_min: float, tau_max: float) -> None:
+        if tau_min < self.tau_min or tau_max < self.tau_max:
+            self.__materialize()
+            self.stale = True
+        self.tau_min, self.tau_max = tau_min, tau_max
+
+    def evaporate(self: Self, rho: float) -> None:
+        self.scale *= 1.0 - rho
+        if self.stale or self.scale < self.tolerance:
+            self.__materialize()
+
+    def deposit(self: Self, keys: Iterable[Hashable], amount: float) -> None:
+        if self.size is None:
+            for k in keys:
+                self.values[k] = min(self.tau_max, self[k] + amount) / self.scale
+        else:
+            idx = np.fromiter(keys, dtype=np.intp)
+            v = np.clip(self.values[idx] * self.scale, self.tau_min, self.tau_max) + amount
+            self.values[idx] = np.minimum(v, self.tau_max) / self.scale
+
+    def __materialize(self: Self) -> None:
+        if self.size is None:
+            self.default = self.__clamp(self.default * self.scale)
+            self.values = {k: v for k, u in self.values.items()
+                           if (v := self.__clamp(u * self.scale)) != self.default}
+        else:
+            self.values = np.clip(self.values * self.scale, self.tau_min, self.tau_max)
+        self.scale = 1.0
+        self.stale = False
+
+    def __clamp(self: Self, v: float) -> float:
+        return self.tau_min if v < self.tau_min else self.tau_max if v > self.tau_max else v
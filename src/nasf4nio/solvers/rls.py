@@ -1,34 +1,55 @@
 from __future__ import annotations
 
-from typing import cast, TypeVar, Protocol, Optional, Iterable, Any
+import random
+
+from collections import deque
+
+from typing import cast, TypeVar, Protocol, Optional, Iterable, Hashable, Any
 from typing_extensions import Self
 
+from ..utils import provided, tracked
+from ..observers import Observer, INCUMBENT
+
 T = TypeVar('T')
 LocalMove = TypeVar('LocalMove')
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol) 
 
 class SolutionProtocol(Protocol[T, LocalMove]):
+    def objective(self: Self) -> Optional[T]: ...
     def step(self: Self, move: LocalMove) -> None: ...
     def random_local_moves_wor(self: Self) -> Iterable[LocalMove]: ...
     def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
+    # Optional, see DeterministicFirstImprovement
+    def dlb_keys(self: Self) -> Iterable[Hashable]: ...
+    def local_moves_at(self: Self, key: Hashable) -> Iterable[LocalMove]: ...
+    def touched(self: Self, move: LocalMove) -> Iterable[Hashable]: ...
 
 Solution = TypeVar('Solution', bound=SolutionProtocol)
     
 class RLS:
-    def __init__(self: Self, zero: Any = 0):
+    def __init__(self: Self, zero: Any = 0, observer: Optional[Observer] = None):
         self.zero = zero
+        self.observer = observer
 
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        if provided(solution, "dlb_keys"):
+            return self.__dlb(solution, timer)
         while not timer.finished():
             for move in solution.random_local_moves_wor():
                 incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
                 if incr >= self.zero:
                     solution.step(move)
-                    print(solution.score())
+                    timer.iterated(solution.objective())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=solution.objective())
                     break
                 if timer.finished():
                     return solution
@@ -36,3 +57,28 @@ class RLS:
                 break
         return solution    
 
+    # Sideways moves are still taken, but only strictly improving ones bring
+    # the keys they touch back into the queue, so that the search ends on a
+    # plateau instead of walking it until the timer runs out.
+    def __dlb(self: Self, solution: Solution, timer: Timer) -> Solution:
+        keys = list(solution.dlb_keys())
+        random.shuffle(keys)
+        queue, active = deque(keys), set(keys)
+        while len(queue) and not timer.finished():
+            key = queue.popleft()
+            active.discard(key)
+            for move in solution.local_moves_at(key):
+                incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
+                if incr >= self.zero:
+                    solution.step(move)
+                    timer.iterated(solution.objective())
+                    if self.observer is not None:
+                        self.observer(INCUMBENT, objective=solution.objective())
+                    if incr > self.zero:
+                        for k in solution.touched(move):
+                            if k not in active:
+                                active.add(k)
+                                queue.append(k)
+                    break
+        return solution
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
-from typing import Generic, TypeVar, Protocol, Optional
+from typing import Generic, TypeVar, Protocol, Optional, Any
 from typing_extensions import Self
 
+from ..observers import Observer, ITERATION
+
 Component = TypeVar("Component")
 
 class SimpleConstruction: 
+    def __init__(self: Self, observer: Optional[Observer] = None) -> None:
+        self.observer = observer
+
     def __call__(self: Self, solution: Solution) -> Solution:
         while (c := next(solution.add_moves(), None)) is not None:
             solution.add(c)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=solution.objective())
         return solution 
     
     class SolutionProtocol(Protocol[Component]):
+        def objective(self: Self) -> Any: ...
         def add_moves(self: Self) -> Optional[Component]: ...
         def add(self: Self, component: Component) -> None: ...  
         
@@ -2,15 +2,18 @@ from __future__ import annotations
 
 import random
 
-from typing import cast, Optional, Union, TypeVar, Protocol, Iterable, Callable
+from typing import cast, Optional, Union, TypeVar, Protocol, Iterable, Callable, Any
 from typing_extensions import Self
 
-from ..utils import LinearDecay, ExponentialAcceptance
+from ..utils import LinearDecay, ExponentialAcceptance, Incumbent, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
 
 Number = Union[float, int]
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     def elapsed(self: Self) -> float: ...
     def budget(self: Self) -> float: ...
     
@@ -35,27 +38,77 @@ class SimulatedAnnealing:
     def __init__(self: Self, temperature: float,
                  seed: Optional[int] = None,
                  decay: Optional[TemperatureDecay] = None,
-                 acceptance: Optional[AcceptanceCriteria] = None) -> None:
+                 acceptance: Optional[AcceptanceCriteria] = None,
+                 epoch: Optional[int] = None,
+                 observer: Optional[Observer] = None) -> None:
         self.temperature = temperature
         self.decay = LinearDecay(self.temperature) if decay is None else decay
         self.acceptance = ExponentialAcceptance() if acceptance is None else acceptance
-        
-        if seed is not None:
-            random.seed(seed)
+        self.epoch = epoch
+        self.observer = observer
+        self.rng = random.Random(seed)
   
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
-        best = solution.copy()
-        bobjv = cast(T, best.objective())
+        timer = tracked(timer)
+        if self.epoch is not None:
+            return self.__epochs(solution, timer)
+        best = Incumbent(solution)
+        bobjv = cast(T, solution.objective())
         while not timer.finished():
             for move in solution.random_local_moves_wor():
                 if (t := self.decay(1 - timer.elapsed() / timer.budget())) <= 0:
                     break
                 delta = cast(T, solution.objective_increment_local(move))
-                if self.acceptance(delta, t) >= random.random():
+                timer.evaluated()
+                if self.acceptance(delta, t) >= self.rng.random():
                     solution.step(move)
                     obj = cast(T, solution.objective())
                     if bobjv is None or obj > bobjv:
-                        best = solution.copy()
+                        best.save()
                         bobjv = obj
+                        if self.observer is not None:
+                            self.observer(INCUMBENT, objective=bobjv)
+                    timer.iterated(bobjv)
+                    if self.observer is not None:
+                        self.observer(ITERATION, objective=obj, temperature=t)
                     break
-        return best
+        return best.result()
+
+    # The temperature is updated once per epoch and a single move stream is
+    # kept across accepted moves, so random_local_moves_wor must build each
+    # move against the current state. The incumbent is copied lazily, right
+    # before the first worsening step away from it.
+    def __epochs(self: Self, solution: Solution, timer: Timer) -> Solution:
+        best = solution.copy()
+        bobjv = cast(T, best.objective())
+        obj, current = bobjv, False
+        moves = iter(solution.random_local_moves_wor())
+        rand = self.rng.random
+        while not timer.finished():
+            if (t := self.decay(1 - timer.elapsed() / timer.budget())) <= 0:
+                break
+            evaluations, accepted, improved = 0, 0, False
+            for u in [rand() for _ in range(self.epoch)]:
+                if (move := next(moves, None)) is None:
+                    moves = iter(solution.random_local_moves_wor())
+                    if (move := next(moves, None)) is None:
+                        break
+                delta = cast(T, solution.objective_increment_local(move))
+                evaluations += 1
+                if self.acceptance(delta, t) >= u:
+                    if current and delta < 0:
+                        best, current = solution.copy(), False
+                    solution.step(move)
+                    obj = cast(T, solution.objective())
+                    accepted += 1
+                    if obj > bobjv:
+                        bobjv, current, improved = obj, True, True
+            timer.evaluated(evaluations)
+            if improved and self.observer is not None:
+                self.observer(INCUMBENT, objective=bobjv)
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=obj, temperature=t, accepted=accepted)
+            if evaluations == 0:
+                break
+        return solution.copy() if current else best
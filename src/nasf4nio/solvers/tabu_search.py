@@ -2,14 +2,21 @@ from __future__ import annotations
 
 import random
 
-from typing import cast, Optional, TypeVar, Protocol, Iterable, Any, List
+from typing import cast, Optional, TypeVar, Protocol, Iterable, Sequence, Hashable, Literal, Any, List
 from typing_extensions import Self
 
+from collections import deque
+
+from ..utils import blocks, implemented, tracked
+from ..observers import Observer, INCUMBENT, ITERATION
+
 T = TypeVar('T', bound=Any)
 LocalMove = TypeVar('LocalMove')
 
 class TimerProtocol(Protocol):
     def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
     
 Timer = TypeVar('Timer', bound=TimerProtocol)
 
@@ -21,20 +28,45 @@ class SolutionProtocol(Protocol[T, LocalMove]):
     def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
     def __eq__(self: Self, other: Self) -> bool: ...
 
+# Only needed by the "attribute" and "fingerprint" memories. move_attribute()
+# should return the same value for a move and the move that undoes it, and
+# fingerprint_local() the fingerprint the solution would have after the move.
+class MemoryProtocol(Protocol[LocalMove]):
+    def move_attribute(self: Self, move: LocalMove) -> Hashable: ...
+    def fingerprint_local(self: Self, move: LocalMove) -> Hashable: ...
+
+# Optional, used by the same memories when implemented. Returns the increments
+# of a block of moves as an array supporting comparisons, nonzero() and argsort().
+class BatchProtocol(Protocol[LocalMove]):
+    def objective_increments_local(self: Self, moves: Sequence[LocalMove]) -> Any: ...
+
 Solution = TypeVar('Solution', bound=SolutionProtocol)
 
 class TabuSearch:  
     def __init__(self: Self, length: int = 10,
-                 zero: Any = 0) -> None:
+                 zero: Any = 0,
+                 memory: Literal["solution", "attribute", "fingerprint"] = "solution",
+                 aspiration: bool = True,
+                 block: int = 1024,
+                 observer: Optional[Observer] = None) -> None:
         self.length = length
         self.zero = zero
+        self.memory = memory
+        self.aspiration = aspiration
+        self.block = block
+        self.observer = observer
     
     def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        if self.memory != "solution":
+            return self.__search(solution, timer)
         tabu = list()    
+        result, robjv = None, None
         while not timer.finished():
             bincr, best = self.zero, None
             for move in solution.random_local_moves_wor():
                 incr = solution.objective_increment_local(move)
+                timer.evaluated()
                 if incr >= bincr: 
                     s = solution.copy()
                     s.step(move)
@@ -46,6 +78,63 @@ class TabuSearch:
                 break
             else:
                 tabu.append(best)        
+                if result is None or best.objective() > robjv:
+                    result, robjv = best, best.objective()
+                timer.iterated(robjv)
+                if self.observer is not None:
+                    self.observer(ITERATION, objective=best.objective())
                 if len(tabu) > self.length:
                     tabu.pop(0)
-        return best
\ No newline at end of file
+        return best if result is None else result
+
+    def __search(self: Self, solution: Solution, timer: Timer) -> Solution:
+        key = solution.move_attribute if self.memory == "attribute" else solution.fingerprint_local
+        tabu: dict[Hashable, int] = {}
+        fifo: deque[Hashable] = deque()
+        best, bobjv = solution.copy(), solution.objective()
+        objv = bobjv
+        batched = implemented(getattr(solution, "objective_increments_local", None), [])
+        while not timer.finished():
+            bincr, bmove, bkey = self.zero, None, None
+            if batched:
+                for moves in blocks(solution.random_local_moves_wor(), self.block):
+                    incrs = solution.objective_increments_local(moves)
+                    timer.evaluated(len(moves))
+                    candidates = (incrs >= bincr).nonzero()[0]
+                    for i in candidates[incrs[candidates].argsort()[::-1]]:
+                        k = key(moves[i])
+                        if k not in tabu or (self.aspiration and objv + incrs[i] > bobjv):
+                            bincr, bmove, bkey = incrs[i], moves[i], k
+                            break
+                    if timer.finished():
+                        break
+            else:
+                for move in solution.random_local_moves_wor():
+                    incr = solution.objective_increment_local(move)
+                    timer.evaluated()
+                    if incr is not None and incr >= bincr:
+                        k = key(move)
+                        if k not in tabu or (self.aspiration and objv + incr > bobjv):
+                            bincr, bmove, bkey = incr, move, k
+                    if timer.finished():
+                        break
+            if bmove is None:
+                break
+            solution.step(bmove)
+            objv = solution.objective()
+            if objv > bobjv:
+                best, bobjv = solution.copy(), objv
+                if self.observer is not None:
+                    self.observer(INCUMBENT, objective=bobjv)
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=objv)
+            tabu[bkey] = tabu.get(bkey, 0) + 1
+            fifo.append(bkey)
+            if len(fifo) > self.length:
+                k = fifo.popleft()
+                if tabu[k] == 1:
+                    del tabu[k]
+                else:
+                    tabu[k] -= 1
+        return best
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from operator import methodcaller
+
+from typing import cast, TypeVar, Protocol, Optional, Iterable, Sequence, Callable, Literal, Any
+from typing_extensions import Self
+
+from ..utils import Incumbent, blocks, implemented, tracked
+from ..observers import Observer, INCUMBENT, ITERATION, RESTART
+
+T = TypeVar('T')
+LocalMove = TypeVar('LocalMove')
+
+class TimerProtocol(Protocol):
+    def finished(self: Self) -> bool: ...
+    def evaluated(self: Self, n: int = 1) -> None: ...
+    def iterated(self: Self, objective: Optional[Any] = None) -> None: ...
+
+Timer = TypeVar('Timer', bound=TimerProtocol)
+
+class SolutionProtocol(Protocol[T, LocalMove]):
+    def copy(self: Self) -> Self: ...
+    def objective(self: Self) -> Optional[T]: ...
+    def step(self: Self, move: LocalMove) -> None: ...
+    def perturb(self: Self, ks: int) -> None: ...
+    def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
+    # Optional, see BestImprovement
+    def objective_increments_local(self: Self, moves: Sequence[LocalMove]) -> Any: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+# A neighbourhood returns the moves it contains for a solution, for instance
+# methodcaller("local_moves"). Moves of every neighbourhood are scored with
+# objective_increment_local and applied with step.
+Neighbourhood = Callable[[Solution], Iterable[LocalMove]]
+
+class VND:
+    def __init__(self: Self, neighbourhoods: Optional[Sequence[Neighbourhood]] = None,
+                 improvement: Literal["first", "best"] = "first",
+                 zero: Any = 0, block: int = 1024,
+                 observer: Optional[Observer] = None) -> None:
+        self.neighbourhoods = [methodcaller("local_moves")] if neighbourhoods is None else list(neighbourhoods)
+        self.improvement = improvement
+        self.zero = zero
+        self.block = block
+        self.observer = observer
+
+    def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        batched = implemented(getattr(solution, "objective_increments_local", None), [])
+        k = 0
+        while k < len(self.neighbourhoods) and not timer.finished():
+            move = self.__improving(solution, self.neighbourhoods[k](solution), batched, timer)
+            if move is None:
+                k += 1
+            else:
+                solution.step(move)
+                k = 0
+                timer.iterated(solution.objective())
+                if self.observer is not None:
+                    self.observer(INCUMBENT, objective=solution.objective())
+        return solution
+
+    def __improving(self: Self, solution: Solution, moves: Iterable[LocalMove],
+                    batched: bool, timer: Timer) -> Optional[LocalMove]:
+        first = self.improvement == "first"
+        bincr, bmove = self.zero, None
+        if batched:
+            for block in blocks(moves, self.block):
+                incrs = solution.objective_increments_local(block)
+                timer.evaluated(len(block))
+                i = int(incrs.argmax())
+                if incrs[i] > bincr:
+                    bincr, bmove = incrs[i], block[i]
+                    if first:
+                        break
+                if timer.finished():
+                    break
+        else:
+            for move in moves:
+                incr = cast(T, solution.objective_increment_local(move))
+                timer.evaluated()
+                if incr > bincr:
+                    bincr, bmove = incr, move
+                    if first:
+                        break
+                if timer.finished():
+                    break
+        return bmove
+
+class VNS:
+    def __init__(self: Self, neighbourhoods: Optional[Sequence[Neighbourhood]] = None,
+                 ks: Sequence[int] = (1, 2, 3),
+                 improvement: Literal["first", "best"] = "first",
+                 zero: Any = 0, block: int = 1024,
+                 observer: Optional[Observer] = None) -> None:
+        self.descent = VND(neighbourhoods, improvement, zero, block)
+        self.ks = list(ks)
+        self.observer = observer
+
+    def __call__(self: Self, solution: Solution, timer: Timer) -> Solution:
+        timer = tracked(timer)
+        solution = self.descent(solution, timer)
+        best = Incumbent(solution)
+        bobjv = cast(T, solution.objective())
+        k = 0
+        while not timer.finished():
+            solution.perturb(self.ks[k])
+            solution = self.descent(solution, timer)
+            obj = cast(T, solution.objective())
+            if obj > bobjv:
+                best.save()
+                bobjv, k = obj, 0
+                if self.observer is not None:
+                    self.observer(INCUMBENT, objective=bobjv)
+            else:
+                solution = best.restore()
+                k = (k + 1) % len(self.ks)
+                if self.observer is not None:
+                    self.observer(RESTART, objective=bobjv, ks=self.ks[k])
+            timer.iterated(bobjv)
+            if self.observer is not None:
+                self.observer(ITERATION, objective=bobjv)
+        return best.result() if cast(T, solution.objective()) <= bobjv else solution
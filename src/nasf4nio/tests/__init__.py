@@ -1 +1,6 @@
-from .increments import objective_increment_add_test 
\ No newline at end of file
+from .increments import objective_increment_add_test, objective_increment_local_test
+from .candidates import invalidated_add_moves_test
+from .batch import objective_increments_local_test, batched_add_moves_test
+from .undo import checkpoint_rollback_test
+from .dlb import dont_look_bits_test
+from .fingerprint import fingerprint_test
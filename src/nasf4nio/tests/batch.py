@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import random
+
+from typing import Optional, Protocol, TypeVar, Iterable, Sequence, Any
+from typing_extensions import Self
+
+from ..utils import isclose, implemented
+
+T = TypeVar("T")
+LocalMove = TypeVar("LocalMove")
+
+class SolutionProtocol(Protocol[T, LocalMove]):
+    def step(self: Self, move: LocalMove) -> None: ...
+    def local_moves(self: Self) -> Iterable[LocalMove]: ...
+    def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
+    def objective_increments_local(self: Self, moves: Sequence[LocalMove]) -> Any: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+class ProblemProtocol(Protocol):
+    def random_solution(self: Self, seed: Optional[Any] = None) -> Solution: ...
+
+Problem = TypeVar('Problem', bound=ProblemProtocol)
+
+def objective_increments_local_test(self: Problem, seed: Optional[int] = None, steps: int = 10) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x: Solution = self.random_solution(seed)
+    if not implemented(x.objective_increments_local, []):
+        return
+
+    for _ in range(steps):
+        moves = list(x.local_moves())
+        if not len(moves):
+            break
+        increments = x.objective_increments_local(moves)
+        assert len(increments) == len(moves), f"{len(increments)} (batched) != {len(moves)} (moves)"
+        for move, batched in zip(moves, increments):
+            expected = x.objective_increment_local(move)
+            assert isclose(float(batched), expected), f"{move}: {batched} (batched) != {expected} (single)"
+        x.step(random.choice(moves))
+
+class AddSolutionProtocol(Protocol):
+    def add(self: Self, component: Any) -> None: ...
+    def add_moves(self: Self) -> Iterable[Any]: ...
+    def random_add_move(self: Self) -> Optional[Any]: ...
+
+class AddProblemProtocol(Protocol):
+    def empty_solution(self: Self) -> AddSolutionProtocol: ...
+
+BATCHES = (("upper_bound_increments_add", "upper_bound_increment_add"),
+           ("heuristic_values", "heuristic_value"),
+           ("objective_increments_add", "objective_increment_add"))
+
+def batched_add_moves_test(self: AddProblemProtocol, seed: Optional[int] = None) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x = self.empty_solution()
+    batches = [(batch, single) for batch, single in BATCHES if implemented(getattr(x, batch, None))]
+    if not len(batches):
+        return
+
+    while True:
+        expected = {c.id() for c in x.add_moves()}
+        for batch, single in batches:
+            moves, values = getattr(x, batch)()
+            ids = [c.id() for c in moves]
+            assert set(ids) == expected and len(ids) == len(values), f"{batch}: {ids} (batched) != {expected} (add_moves)"
+            for c, value in zip(moves, values):
+                assert isclose(float(value), getattr(x, single)(c)), f"{batch}: {c} {value} (batched) != {getattr(x, single)(c)} (single)"
+        if (c := x.random_add_move()) is None:
+            break
+        x.add(c)
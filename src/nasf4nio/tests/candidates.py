@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import random
+
+from typing import Optional, Protocol, TypeVar, Iterable, Hashable
+from typing_extensions import Self
+
+T = TypeVar("T")
+Component = TypeVar("Component")
+
+class SolutionProtocol(Protocol[T, Component]):
+    def add(self: Self, component: Component) -> None: ...
+    def add_moves(self: Self) -> Iterable[Component]: ...
+    def invalidated_add_moves(self: Self) -> Optional[tuple[Iterable[Component], Iterable[Component]]]: ...
+    def upper_bound_increment_add(self: Self, component: Component) -> Optional[T]: ...
+    def random_add_move(self: Self) -> Optional[Component]: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+class ProblemProtocol(Protocol):
+    def empty_solution(self: Self) -> Solution: ...
+
+Problem = TypeVar('Problem', bound=ProblemProtocol)
+
+def invalidated_add_moves_test(self: Problem, seed: Optional[int] = None) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x: Solution = self.empty_solution()
+    candidates: dict[Hashable, Optional[T]] = {c.id(): x.upper_bound_increment_add(c) for c in x.add_moves()}
+
+    while (c := x.random_add_move()) is not None:
+        x.add(c)
+        if (delta := x.invalidated_add_moves()) is None:
+            candidates = {c.id(): x.upper_bound_increment_add(c) for c in x.add_moves()}
+            continue
+        removed, changed = delta
+        for r in removed:
+            candidates.pop(r.id(), None)
+        for r in changed:
+            candidates[r.id()] = x.upper_bound_increment_add(r)
+        expected = {c.id(): x.upper_bound_increment_add(c) for c in x.add_moves()}
+        assert candidates == expected, f"{c} (added): {candidates} (incremental) != {expected} (rescan)"
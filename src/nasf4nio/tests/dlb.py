@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import random
+
+from typing import Optional, Protocol, TypeVar, Iterable, Hashable, Any
+from typing_extensions import Self
+
+LocalMove = TypeVar("LocalMove")
+
+class SolutionProtocol(Protocol[LocalMove]):
+    def step(self: Self, move: LocalMove) -> None: ...
+    def local_moves(self: Self) -> Iterable[LocalMove]: ...
+    def dlb_keys(self: Self) -> Iterable[Hashable]: ...
+    def local_moves_at(self: Self, key: Hashable) -> Iterable[LocalMove]: ...
+    def touched(self: Self, move: LocalMove) -> Iterable[Hashable]: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+class ProblemProtocol(Protocol):
+    def random_solution(self: Self, seed: Optional[Any] = None) -> Solution: ...
+
+Problem = TypeVar('Problem', bound=ProblemProtocol)
+
+def dont_look_bits_test(self: Problem, seed: Optional[int] = None, steps: int = 10) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x: Solution = self.random_solution(seed)
+
+    for _ in range(steps):
+        keys = set(x.dlb_keys())
+        moves = set(x.local_moves())
+        at = {m for k in keys for m in x.local_moves_at(k)}
+        assert at == moves, f"{len(at)} moves at keys != {len(moves)} local moves"
+        if not len(moves):
+            break
+        move = random.choice(list(moves))
+        x.step(move)
+        touched = set(x.touched(move))
+        assert touched <= keys, f"{touched - keys} are not keys"
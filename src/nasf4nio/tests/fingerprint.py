@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import random
+
+from typing import Optional, Protocol, TypeVar, Iterable, Hashable, Any
+from typing_extensions import Self
+
+from ..utils import fingerprint
+
+class SolutionProtocol(Protocol):
+    def components(self: Self) -> Iterable[Any]: ...
+    def perturb(self: Self, ks: int) -> None: ...
+    def fingerprint(self: Self) -> Hashable: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+class ProblemProtocol(Protocol):
+    def random_solution(self: Self, seed: Optional[Any] = None) -> Solution: ...
+
+Problem = TypeVar('Problem', bound=ProblemProtocol)
+
+def fingerprint_test(self: Problem, seed: Optional[int] = None, steps: int = 10) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x: Solution = self.random_solution(seed)
+
+    for _ in range(steps):
+        expected = fingerprint(c.id() for c in x.components())
+        assert x.fingerprint() == expected, f"{x.fingerprint()} (incremental) != {expected} (components)"
+        x.perturb(random.randint(1, 5))
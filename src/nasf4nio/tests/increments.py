@@ -7,6 +7,8 @@ from typing_extensions import Self
 
 from dataclasses import dataclass
 
+from ..utils import isclose
+
 T = TypeVar("T")
 Component = TypeVar("Component")
 
@@ -36,4 +38,28 @@ def objective_increment_add_test(self: Problem, seed: Optional[int] = None) -> N
         y.add(c)
         after = y.objective()
         assert (before + increment) == after, f"{before} (before) + {increment} (increment) != {after} (after) "
-        
\ No newline at end of file
+
+LocalMove = TypeVar("LocalMove")
+
+class LocalSolutionProtocol(Protocol[T, LocalMove]):
+    def step(self: Self, move: LocalMove) -> None: ...
+    def objective(self: Self) -> T: ...
+    def objective_increment_local(self: Self, move: LocalMove) -> Optional[T]: ...
+    def random_local_move(self: Self) -> Optional[LocalMove]: ...
+
+class LocalProblemProtocol(Protocol):
+    def random_solution(self: Self, seed: Optional[int] = None) -> LocalSolutionProtocol: ...
+
+def objective_increment_local_test(self: LocalProblemProtocol, seed: Optional[int] = None, steps: int = 100) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x = self.random_solution(seed)
+
+    for _ in range(steps):
+        if (move := x.random_local_move()) is None:
+            break
+        before, increment = x.objective(), x.objective_increment_local(move)
+        x.step(move)
+        after = x.objective()
+        assert isclose(before + increment, after), f"{move}: {before} (before) + {increment} (increment) != {after} (after)"
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import random
+
+from typing import Optional, Protocol, TypeVar, Hashable, Any
+from typing_extensions import Self
+
+T = TypeVar("T")
+
+class SolutionProtocol(Protocol[T]):
+    def copy(self: Self) -> Self: ...
+    def objective(self: Self) -> T: ...
+    def perturb(self: Self, ks: int) -> None: ...
+    def checkpoint(self: Self) -> Hashable: ...
+    def rollback(self: Self, mark: Hashable) -> None: ...
+
+Solution = TypeVar('Solution', bound=SolutionProtocol)
+
+class ProblemProtocol(Protocol):
+    def random_solution(self: Self, seed: Optional[Any] = None) -> Solution: ...
+
+Problem = TypeVar('Problem', bound=ProblemProtocol)
+
+def checkpoint_rollback_test(self: Problem, seed: Optional[int] = None, steps: int = 10) -> None:
+    if seed is not None:
+        random.seed(seed)
+
+    x: Solution = self.random_solution(seed)
+    y = x.copy()
+    mark = x.checkpoint()
+
+    for _ in range(steps):
+        x.perturb(random.randint(1, 5))
+        x.rollback(mark)
+        assert x == y, "rollback did not restore the checkpoint"
+        assert x.objective() == y.objective(), f"{x.objective()} (rolled back) != {y.objective()} (checkpoint)"
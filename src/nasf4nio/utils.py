@@ -4,18 +4,32 @@ import math
 import time
 import random
 
-from typing import Optional, Iterable, Any, TypeVar
+from typing import Optional, Iterable, Iterator, Sequence, Callable, Any, TypeVar, Hashable, List, Generic
 from typing_extensions import Self
 
 from dataclasses import dataclass
+from collections import OrderedDict
+from itertools import islice, chain
 from operator import itemgetter
 
+from . import api
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 T = TypeVar('T')
+S = TypeVar('S')
+
+MASK64 = (1 << 64) - 1
 
 class Timer:
     def __init__(self: Self, budget: Optional[float] = None) -> None:
         self.limit = math.inf if budget is None else budget 
         self.start = time.perf_counter()
+        self.evaluations = 0
+        self.iterations = 0
     
     def budget(self: Self) -> float:
         return self.limit
@@ -26,6 +40,80 @@ class Timer:
     def finished(self) -> bool:
         return self.elapsed() > self.limit
 
+    def evaluated(self: Self, n: int = 1) -> None:
+        self.evaluations += n
+
+    def iterated(self: Self, objective: Optional[Any] = None) -> None:
+        self.iterations += 1
+
+# Stops at the first of a time budget, a number of evaluations or iterations,
+# a target objective or a number of iterations without improvement. Parallel
+# solvers (GRASP, MMAS, IslandILS and ParallelTempering with n_jobs) send a
+# copy of the timer to every worker and only add up the evaluations when the
+# workers return, so the evaluation and iteration limits are checked per
+# worker and can be exceeded up to once per worker; only the time budget is
+# shared.
+class Termination(Timer):
+    def __init__(self: Self, budget: Optional[float] = None,
+                 evaluations: Optional[int] = None,
+                 iterations: Optional[int] = None,
+                 target: Optional[Any] = None,
+                 stall: Optional[int] = None,
+                 stride: int = 1,
+                 adaptive: bool = False,
+                 resolution: float = 1e-3) -> None:
+        super().__init__(budget)
+        self.max_evaluations = math.inf if evaluations is None else evaluations
+        self.max_iterations = math.inf if iterations is None else iterations
+        self.target = target
+        self.stall = math.inf if stall is None else stall
+        self.stride = stride
+        self.adaptive = adaptive
+        self.resolution = resolution
+        self.countdown = stride
+        self.last = self.start
+        self.best: Optional[Any] = None
+        self.stalled = 0
+        self.reason: Optional[str] = None
+
+    def finished(self: Self) -> bool:
+        if self.reason is not None:
+            return True
+        self.countdown -= 1
+        if self.countdown > 0:
+            return False
+        now = time.perf_counter()
+        if self.adaptive:
+            # Keep the time between clock reads around the resolution
+            if now - self.last < 0.5 * self.resolution:
+                self.stride *= 2
+            elif now - self.last > self.resolution and self.stride > 1:
+                self.stride //= 2
+            self.last = now
+        self.countdown = self.stride
+        if now - self.start > self.limit:
+            self.reason = "time"
+        return self.reason is not None
+
+    def evaluated(self: Self, n: int = 1) -> None:
+        self.evaluations += n
+        if self.evaluations >= self.max_evaluations:
+            self.reason = "evaluations"
+
+    def iterated(self: Self, objective: Optional[Any] = None) -> None:
+        self.iterations += 1
+        if objective is not None:
+            if self.best is None or objective > self.best:
+                self.best, self.stalled = objective, 0
+            else:
+                self.stalled += 1
+            if self.target is not None and self.best >= self.target:
+                self.reason = "target"
+            elif self.stalled >= self.stall:
+                self.reason = "stall"
+        if self.iterations >= self.max_iterations:
+            self.reason = "iterations"
+
 @dataclass 
 class ConstantDecay:
     alpha: float
@@ -43,26 +131,288 @@ class ExponentialAcceptance:
     def __call__(self: Self, delta: float, temperature: float) -> float:
         return math.exp(delta / temperature) if delta < 0 else 1.0
      
+class LazySequence(Sequence[T]):
+    "Sequence of factory(key) over keys, built on access"
+    def __init__(self: Self, factory: Callable[[Any], T], keys: Sequence[Any]) -> None:
+        self.factory = factory
+        self.keys = keys
+
+    def __len__(self: Self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self: Self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return LazySequence(self.factory, self.keys[i])
+        return self.factory(self.keys[i])
+
+# The best state of a working solution. It is kept as a checkpoint of the
+# solution itself when checkpoint/rollback are implemented and as a copy
+# otherwise; restore() returns the working solution reverted to it.
+class Incumbent(Generic[S]):
+    def __init__(self: Self, solution: S) -> None:
+        self.solution = solution
+        self.undo = provided(solution, "checkpoint")
+        self.save()
+
+    def save(self: Self) -> None:
+        if self.undo:
+            self.mark = self.solution.checkpoint()
+        else:
+            self.best = self.solution.copy()
+
+    def restore(self: Self) -> S:
+        if self.undo:
+            self.solution.rollback(self.mark)
+        else:
+            self.solution = self.best.copy()
+        return self.solution
+
+    def result(self: Self) -> S:
+        if self.undo:
+            self.solution.rollback(self.mark)
+            return self.solution
+        return self.best
+
+# Solvers count evaluations and iterations on their timer. Timers that only
+# implement finished() are wrapped by tracked() in an adapter that does the
+# counting itself and forwards everything else.
+class TrackedTimer:
+    def __init__(self: Self, timer: Any) -> None:
+        self.timer = timer
+        self.evaluations = 0
+        self.iterations = 0
+
+    def __getattr__(self: Self, name: str) -> Any:
+        if name == "timer":
+            raise AttributeError(name)
+        return getattr(self.timer, name)
+
+    def finished(self: Self) -> bool:
+        return self.timer.finished()
+
+    def evaluated(self: Self, n: int = 1) -> None:
+        self.evaluations += n
+
+    def iterated(self: Self, objective: Optional[Any] = None) -> None:
+        self.iterations += 1
+
+def tracked(timer: Any) -> Any:
+    "The timer itself when it counts evaluations and iterations, a TrackedTimer otherwise"
+    if hasattr(timer, "evaluated") and hasattr(timer, "iterated"):
+        return timer
+    return TrackedTimer(timer)
+
+class LRUCache:
+    "Bounded mapping that evicts the least recently used entry and counts hits"
+    def __init__(self: Self, size: int = 1024) -> None:
+        self.size = size
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self: Self) -> int:
+        return len(self.entries)
+
+    def lookup(self: Self, key: Hashable) -> tuple[bool, Any]:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self: Self, key: Hashable, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self: Self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+def cached_search(results: Optional[LRUCache], search: Callable[..., Any], solution: Any, **kwargs: Any) -> Any:
+    "search(solution, **kwargs), cached in results under the solution fingerprint when there is one"
+    if results is None or not provided(solution, "fingerprint"):
+        return search(solution, **kwargs)
+    key = solution.fingerprint()
+    hit, result = results.lookup(key)
+    if not hit:
+        result = search(solution, **kwargs)
+        results.put(key, None if result is None else result.copy())
+        return result
+    # The cached copies are never handed out, so callers can keep or change
+    # the solutions they get
+    return None if result is None else result.copy()
+
+class FenwickSampler:
+    "Weighted sampling of slots with O(log n) draws and weight updates"
+    def __init__(self: Self, capacity: int = 16) -> None:
+        self.weights: List[float] = []
+        self.tree = [0.0] * (capacity + 1)
+        self.updates = 0
+
+    def __len__(self: Self) -> int:
+        return len(self.weights)
+
+    def append(self: Self, weight: float) -> int:
+        if len(self.weights) + 1 >= len(self.tree):
+            self.tree = [0.0] * (2 * len(self.tree))
+            self.__rebuild()
+        self.weights.append(0.0)
+        self.update(len(self.weights) - 1, weight)
+        return len(self.weights) - 1
+
+    def update(self: Self, slot: int, weight: float) -> None:
+        tree, delta = self.tree, weight - self.weights[slot]
+        self.weights[slot] = weight
+        j = slot + 1
+        while j < len(tree):
+            tree[j] += delta
+            j += j & -j
+        # Rounding errors accumulate in the partial sums, so they are
+        # recomputed once every slot could have been updated
+        self.updates += 1
+        if self.updates > len(tree):
+            self.__rebuild()
+
+    def total(self: Self) -> float:
+        s, j = 0.0, len(self.weights)
+        while j > 0:
+            s += self.tree[j]
+            j -= j & -j
+        return s
+
+    def sample(self: Self, rng: Any = random) -> int:
+        tree, u = self.tree, rng.random() * self.total()
+        slot, step = 0, 1 << (len(tree) - 1).bit_length() - 1
+        while step:
+            if slot + step < len(tree) and tree[slot + step] <= u:
+                slot += step
+                u -= tree[slot]
+            step >>= 1
+        if slot >= len(self.weights) or self.weights[slot] <= 0:
+            slot = max(range(len(self.weights)), key=self.weights.__getitem__)
+        return slot
+
+    def __rebuild(self: Self) -> None:
+        tree = self.tree
+        tree[0] = 0.0
+        tree[1:] = self.weights + [0.0] * (len(tree) - len(self.weights) - 1)
+        for i in range(1, len(tree)):
+            if (j := i + (i & -i)) < len(tree):
+                tree[j] += tree[i]
+        self.updates = 0
+
 def argmax(seq: Iterable[T]) -> int:
     return max(enumerate(seq), key=itemgetter(1))[0]
 
+def blocks(iterable: Iterable[T], n: int) -> Iterator[List[T]]:
+    it = iter(iterable)
+    while len(block := list(islice(it, n))):
+        yield block
+
+# Optional protocol methods are detected with provided(), which does not
+# call them. Whether the batched methods work also depends on NumPy being
+# installed, so those are probed with implemented(), which calls them and must
+# only be given methods that are cheap and free of side effects.
+def implemented(method: Optional[Callable[..., Any]], *args: Any) -> bool:
+    "Whether an optional protocol method exists and does not raise NotImplementedError when called with args"
+    if method is None:
+        return False
+    try:
+        method(*args)
+    except NotImplementedError:
+        return False
+    return True
+
+def provided(obj: Any, name: str) -> bool:
+    "Whether obj has an optional protocol method other than the api.Solution default, without calling it"
+    method = getattr(type(obj), name, None)
+    return method is not None and method is not getattr(api.Solution, name, None)
+
 def isclose(a, b, rel_tol = 1e-6, abs_tol = 1e-9):
     return math.isclose(a, b, rel_tol = rel_tol, abs_tol = abs_tol)
+
+def component_hash(key: Hashable) -> int:
+    "SplitMix64 finalizer over hash(key)"
+    x = (hash(key) + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+def fingerprint(keys: Iterable[Hashable]) -> int:
+    "Order-independent hash of a set of component ids"
+    return sum(map(component_hash, keys)) & MASK64
     
    
-def non_repeating_lcg(n: int, seed: Optional[Any] = None) -> Iterable[int]:
-    if seed is not None:
-        random.seed(seed)
+def spawn(rng: random.Random, n: int) -> List[random.Random]:
+    "Independent generators seeded from rng"
+    return [random.Random(rng.getrandbits(128)) for _ in range(n)]
+
+def non_repeating_lcg(n: int, seed: Optional[Any] = None, rng: Optional[random.Random] = None) -> Iterable[int]:
     "Pseudorandom sampling without replacement in O(1) space"
+    rng = random.Random(seed) if seed is not None else (random if rng is None else rng)
     if n > 0:
         a = 5 # always 5
         m = 1 << math.ceil(math.log2(n))
         if m > 1:
-            c = random.randrange(1, m, 2)
-            x = random.randrange(m)
+            c = rng.randrange(1, m, 2)
+            x = rng.randrange(m)
             for _ in range(m):
                 if x < n: 
                     yield x
                 x = (a * x + c) % m
         else:
             yield 0
+
+def shuffled_blocks(n: int, block: int = 1024, rng: Optional[random.Random] = None) -> Iterator[List[int]]:
+    "Random permutation of range(n), generated lazily in blocks"
+    rng = random if rng is None else rng
+    if n <= block:
+        if n > 0:
+            yield rng.sample(range(n), n)
+    elif np is not None:
+        yield from _feistel_blocks(n, block, rng)
+    else:
+        yield from _fisher_yates_blocks(n, block, rng)
+
+def shuffled(n: int, rng: Optional[random.Random] = None, block: int = 1024) -> Iterator[int]:
+    return chain.from_iterable(shuffled_blocks(n, block, rng))
+
+# Four-round Feistel network over the smallest even number of bits covering
+# n, applied to a block of counters at a time; outputs >= n are dropped.
+def _feistel_blocks(n: int, block: int, rng: Any) -> Iterator[List[int]]:
+    bits = ((n - 1).bit_length() + 1) // 2
+    half, mask = np.uint64(bits), np.uint64((1 << bits) - 1)
+    keys = [np.uint64(rng.getrandbits(64)) for _ in range(4)]
+    m = 1 << (2 * bits)
+    for start in range(0, m, block):
+        x = np.arange(start, min(start + block, m), dtype=np.uint64)
+        left, right = x >> half, x & mask
+        for k in keys:
+            left, right = right, left ^ (_splitmix(right ^ k) & mask)
+        y = (left << half) | right
+        if len(y := y[y < n]):
+            yield y.tolist()
+
+def _splitmix(z: Any) -> Any:
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+# Fisher-Yates shuffle that only records the displaced entries
+def _fisher_yates_blocks(n: int, block: int, rng: Any) -> Iterator[List[int]]:
+    rand, displaced = rng.random, {}
+    for start in range(0, n, block):
+        out = []
+        for i in range(start, min(start + block, n)):
+            j = i + int(rand() * (n - i))
+            x = displaced.pop(i, i)
+            if j == i:
+                out.append(x)
+            else:
+                out.append(displaced.get(j, j))
+                displaced[j] = x
+        yield out